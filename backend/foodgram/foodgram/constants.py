@@ -21,11 +21,70 @@ NO_TAGS_TEXT = 'Добавьте тэг'
 NONEXISTENT_INGREDIENT_TEXT = 'Нет такого ингредиента'
 TAGS_DUPLICATE = 'Тэги не должны повторяться'
 INGREDIENTS_DUPLICATE = 'Ингредиенты не должны повторяться'
+INVALID_RECIPES_LIMIT = {
+    'recipes_limit': 'Укажите неотрицательное целое число'
+}
+MAX_BULK_RECIPES = 100
+TOO_MANY_ITEMS = 'Не больше {max_length} элементов за раз'
+
+# Images:
+IMAGE_VARIANTS_DIR = 'recipes/variants'
+IMAGE_VARIANT_SIZES = {
+    'card': (600, 400),
+    'thumbnail': (240, 160),
+    'admin': (80, 60),
+}
+IMAGE_VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+IMAGE_VARIANT_QUALITY = 80
+
+# Shopping list:
+SHOPPING_LIST_FONT = 'DejaVuSerif'
+SHOPPING_LIST_TITLE = 'Список покупок:'
+SHOPPING_LIST_ITEM = '{} ({}) — {}'
+SHOPPING_LIST_FILENAME = 'список_покупок.pdf'
+SHOPPING_LIST_CACHE_PREFIX = 'shopping-list-pdf'
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Pagination:
+PAGINATION_PARAM = 'pagination'
+CURSOR_PAGINATION = 'cursor'
+# Ниже этого числа строк админка считает их точным COUNT(*).
+ADMIN_EXACT_COUNT_LIMIT = 10_000
+
+# Caches:
+CATALOG_VERSION_KEY = 'catalog-version:{}'
+CATALOG_BODY_KEY = 'catalog-body:{}:{}'
+CATALOG_BODY_TIMEOUT = 60 * 60 * 24
+CATALOG_MAX_AGE = 60
+TAG_IDS_KEY = 'tag-ids:{}'
+INGREDIENTS_VERSION = 'ingredients'
+TAGS_VERSION = 'tags'
+RECIPES_VERSION = 'recipes'
+RECIPE_VERSION = 'recipe:{}'
+AUTHOR_VERSION = 'author:{}'
+RECIPE_FRAGMENT_KEY = 'recipe-json:{}:{}:{}:{}:{}'
+RECIPE_CACHE_KEY = 'recipes-response:{version}:{action}:{pk}:{digest}'
+RECIPE_CACHE_PARAMS = ('tags', 'author', 'page', 'limit', 'cursor',
+                       'pagination', 'is_favorited', 'is_in_shopping_cart',
+                       'search')
+RECIPE_CACHE_HITS = 'recipes-response:hits'
+RECIPE_CACHE_MISSES = 'recipes-response:misses'
+
+# Metrics:
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_PREFIX = 'foodgram'
+
+# Jobs:
+SHOPPING_LIST_JOB = 'shopping_list'
+IMAGE_VARIANTS_JOB = 'image_variants'
+JOB_MAX_ATTEMPTS = 3
+JOB_TIMED_OUT = 'Задача не завершилась за {timeout} с'
+JOB_CLEANUP_INTERVAL = 60 * 60
 
 # Views:
 NO_RECIPE = {'errors': 'Такого рецепта не существует'}
-NONEXISTENT_CART_FAV_ITEM = {'errors': 'Вы не добавляли этого рецепта'}
 
 DOUBLE_SUB = {'errors': 'Вы уже подписаны на этого пользователя'}
 SELF_SUB = {'errors': 'Нельзя подписаться на себя'}
 NONEXISTENT_SUB = {'errors': 'Вы не подписаны на этого пользователя'}
+JOB_NOT_READY = {'errors': 'Задача ещё не выполнена'}
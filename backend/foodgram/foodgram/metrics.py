@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from .constants import METRICS_BUCKETS, METRICS_PREFIX
+
+_local = threading.local()
+
+
+class QueryTimer:
+    """ Число и суммарное время запросов к БД (execute_wrapper). """
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestStats:
+    """ Замеры одного запроса. """
+
+    def __init__(self):
+        self.queries = QueryTimer()
+        self.serializer = 0
+        self.serializing = False
+        self.render_start = None
+        self.render = 0
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+def set_current_stats(stats):
+    _local.stats = stats
+
+
+def timed_data(data):
+    """ Свойство data сериализатора, засекающее время внешнего вызова. """
+
+    def getter(serializer):
+        stats = current_stats()
+        if stats is None or stats.serializing:
+            return data.fget(serializer)
+        stats.serializing = True
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            stats.serializer += time.perf_counter() - start
+            stats.serializing = False
+    return property(getter)
+
+
+@lru_cache(maxsize=None)
+def timed_serializer_class(serializer_class):
+    """ Подкласс сериализатора с засекаемым свойством data. """
+
+    return type(serializer_class.__name__, (serializer_class,), {
+        '__module__': serializer_class.__module__,
+        'data': timed_data(serializer_class.data),
+    })
+
+
+class SerializerTimingMixin:
+    """ Представление, у которого время get_serializer().data попадает
+    в замеры запроса (Server-Timing и /metrics).
+    """
+
+    @staticmethod
+    def timed(serializer):
+        """ Сериализатор, созданный в обход get_serializer(). """
+
+        serializer.__class__ = timed_serializer_class(type(serializer))
+        return serializer
+
+    def get_serializer(self, *args, **kwargs):
+        return self.timed(super().get_serializer(*args, **kwargs))
+
+
+class Metrics:
+    """ Гистограммы длительности и суммы замеров по маршрутам.
+
+    Данные хранятся в памяти процесса; у каждого процесса gunicorn
+    свои ряды с меткой pid.
+    """
+
+    counters = ('db_seconds', 'db_queries', 'serializer_seconds',
+                'render_seconds', 'response_bytes')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, labels, duration, values):
+        with self.lock:
+            route = self.routes.get(labels)
+            if route is None:
+                route = self.routes[labels] = {
+                    'buckets': [0] * len(METRICS_BUCKETS),
+                    'count': 0,
+                    'sum': 0,
+                    **{name: 0 for name in self.counters}
+                }
+            position = bisect_left(METRICS_BUCKETS, duration)
+            if position < len(METRICS_BUCKETS):
+                route['buckets'][position] += 1
+            route['count'] += 1
+            route['sum'] += duration
+            for name, value in values.items():
+                route[name] += value
+
+    def render(self, extra=()):
+        pid = os.getpid()
+        with self.lock:
+            routes = {labels: {**route, 'buckets': list(route['buckets'])}
+                      for labels, route in self.routes.items()}
+        name = f'{METRICS_PREFIX}_request_duration_seconds'
+        lines = [f'# HELP {name} Время обработки запроса.',
+                 f'# TYPE {name} histogram']
+        for (view, method, status), route in sorted(routes.items()):
+            labels = (f'route="{view}",method="{method}",'
+                      f'status="{status}",pid="{pid}"')
+            cumulative = 0
+            for bound, count in zip(METRICS_BUCKETS, route['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} '
+                             f'{cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} '
+                         f'{route["count"]}')
+            lines.append(f'{name}_sum{{{labels}}} {route["sum"]}')
+            lines.append(f'{name}_count{{{labels}}} {route["count"]}')
+        for counter in self.counters:
+            name = f'{METRICS_PREFIX}_{counter}_total'
+            lines.append(f'# TYPE {name} counter')
+            for (view, method, status), route in sorted(routes.items()):
+                lines.append(
+                    f'{name}{{route="{view}",method="{method}",'
+                    f'status="{status}",pid="{pid}"}} {route[counter]}'
+                )
+        for name, value in extra:
+            name = f'{METRICS_PREFIX}_{name}'
+            lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def metrics_view(request):
+    """ Метрики в текстовом формате Prometheus. """
+
+    from recipes.caching import get_stats
+
+    extra = ()
+    if settings.RECIPE_CACHE_STATS:
+        hits, misses = get_stats()
+        extra = (('recipe_cache_hits_total', hits),
+                 ('recipe_cache_misses_total', misses))
+    return HttpResponse(
+        metrics.render(extra),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
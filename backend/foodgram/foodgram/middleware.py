@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .metrics import RequestStats, current_stats, metrics, set_current_stats
+
+
+class PerformanceMiddleware:
+    """ Замеры запроса: БД, сериализаторы, рендер и размер ответа.
+
+    Итоги попадают в /metrics, а при SERVER_TIMING — ещё и в заголовок
+    Server-Timing ответа.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        set_current_stats(stats)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(stats.queries):
+                response = self.get_response(request)
+        finally:
+            set_current_stats(None)
+        duration = time.perf_counter() - start
+        size = (int(response.get('Content-Length', 0))
+                if response.streaming else len(response.content))
+        match = request.resolver_match
+        metrics.observe(
+            (match.view_name if match else 'unmatched',
+             request.method,
+             response.status_code),
+            duration,
+            {'db_seconds': stats.queries.time,
+             'db_queries': stats.queries.count,
+             'serializer_seconds': stats.serializer,
+             'render_seconds': stats.render,
+             'response_bytes': size}
+        )
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={stats.queries.time * 1000:.1f};'
+                f'desc="{stats.queries.count} queries"',
+                f'serializer;dur={stats.serializer * 1000:.1f}',
+                f'render;dur={stats.render * 1000:.1f}',
+                f'view;dur={duration * 1000:.1f}',
+                f'size;desc="{size} bytes"',
+            ))
+        return response
+
+    def process_template_response(self, request, response):
+        stats = current_stats()
+        if stats is not None:
+            stats.render_start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: setattr(
+                    stats, 'render', time.perf_counter() - stats.render_start
+                )
+            )
+        return response
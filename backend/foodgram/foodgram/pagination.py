@@ -1,5 +1,138 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from foodgram.constants import CURSOR_PAGINATION, PAGINATION_PARAM
 
 
 class CustomLimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class LimitCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+
+
+def keyset_filter(fields, values, lookup):
+    """ (a, b) < (x, y) как a <= x AND (a < x OR a = x AND b < y).
+
+    Граница по первому полю даёт индексу диапазон для чтения.
+    """
+
+    condition = Q(**{f'{fields[-1]}__{lookup}': values[-1]})
+    for field, value in zip(fields[-2::-1], values[-2::-1]):
+        condition = (Q(**{f'{field}__{lookup}': value})
+                     | Q(**{field: value}) & condition)
+    return Q(**{f'{fields[0]}__{lookup}e': values[0]}) & condition
+
+
+class KeysetCursorPagination(LimitCursorPagination):
+    """ Курсор по всем полям сортировки, а не только по первому.
+
+    CursorPagination фильтрует по первому полю, а совпадения
+    пропускает смещением. Здесь позиция — значения всех полей, и
+    страница читается условием (pub_date, id) < (…) по составному
+    индексу. Поля сортируются в одну сторону и вместе уникальны.
+    """
+
+    def decode_cursor(self, request):
+        """ Позиция прячется от CursorPagination: фильтрует она сама. """
+
+        cursor = super().decode_cursor(request)
+        self.position = cursor and cursor.position
+        if self.position is None:
+            return cursor
+        return cursor._replace(position=None)
+
+    def decode_position(self, model, fields):
+        try:
+            values = json.loads(self.position)
+            if len(values) != len(fields):
+                raise ValueError
+            return [model._meta.get_field(field).to_python(value)
+                    for field, value in zip(fields, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = self.decode_cursor(request)
+        position = self.position
+        if position is not None:
+            ordering = self.get_ordering(request, queryset, view)
+            fields = [field.lstrip('-') for field in ordering]
+            descending = ordering[0].startswith('-')
+            queryset = queryset.filter(keyset_filter(
+                fields,
+                self.decode_position(queryset.model, fields),
+                'lt' if cursor.reverse != descending else 'gt'
+            ))
+        page = super().paginate_queryset(queryset, request, view)
+        if position is not None:
+            if cursor.reverse:
+                self.has_next = True
+                self.next_position = position
+            else:
+                self.has_previous = True
+                self.previous_position = position
+            self.display_page_controls = self.template is not None
+        return page
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            field = field.lstrip('-')
+            value = (instance[field] if isinstance(instance, dict)
+                     else getattr(instance, field))
+            values.append(value.isoformat() if isinstance(value, datetime)
+                          else value)
+        return json.dumps(values)
+
+
+class CursorOrPagePagination(CustomLimitPagination):
+    """ Постраничная пагинация или, по запросу, курсорная.
+
+    Курсорная включается параметром pagination=cursor и сохраняется
+    в ссылках next/previous вместе с параметром cursor.
+    """
+
+    cursor_class = LimitCursorPagination
+    cursor_ordering = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(PAGINATION_PARAM) == CURSOR_PAGINATION
+            or LimitCursorPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if not self.use_cursor(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_class()
+        self.cursor_paginator.ordering = self.cursor_ordering
+        return self.cursor_paginator.paginate_queryset(queryset,
+                                                       request,
+                                                       view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is None:
+            return super().get_paginated_response(data)
+        return self.cursor_paginator.get_paginated_response(data)
+
+
+class RecipePagination(CursorOrPagePagination):
+    """ Курсор по (pub_date, id): порядок ленты тот же, что у страниц,
+    и страница читается по индексу recipe_feed_idx.
+    """
+
+    cursor_class = KeysetCursorPagination
+    cursor_ordering = ('-pub_date', '-id')
+
+
+class UserPagination(CursorOrPagePagination):
+    # username уникален, как и id.
+    cursor_ordering = ('username',)
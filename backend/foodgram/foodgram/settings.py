@@ -29,10 +29,12 @@ INSTALLED_APPS = [
 
     'recipes',
     'users',
+    'jobs',
 
 ]
 
 MIDDLEWARE = [
+    'foodgram.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,6 +83,41 @@ else:
         }
     }
 
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+}
+# Версии справочников и закэшированные ответы должны быть общими для
+# всех процессов gunicorn, run_jobs и manage.py, поэтому без DEBUG
+# по умолчанию используется memcached.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND',
+                          'locmem' if DEBUG else 'memcached')
+CACHE_LOCATIONS = {
+    'file': '/var/tmp/foodgram_cache',
+    'memcached': '127.0.0.1:11211',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': (os.getenv('CACHE_LOCATION')
+                     or CACHE_LOCATIONS.get(CACHE_BACKEND, '')),
+    }
+}
+if CACHE_BACKEND in ('locmem', 'file'):
+    # По умолчанию 300 записей: JSON рецептов вытеснял бы сам себя.
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10_000))
+    }
+
+RECIPE_CACHE_TIMEOUT = int(os.getenv('RECIPE_CACHE_TIMEOUT', 60 * 5))
+RECIPE_CACHE_STATS = os.getenv('RECIPE_CACHE_STATS', False) == 'True'
+# Готовый JSON рецептов (recipes.fragments) выключен по умолчанию:
+# он живёт, пока не сменятся версии, а они должны быть общими
+# для процессов (см. CACHE_BACKEND).
+RECIPE_FRAGMENT_TIMEOUT = int(os.getenv('RECIPE_FRAGMENT_TIMEOUT', 0))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -138,6 +175,23 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+INGREDIENT_SEARCH_CONTAINS = (
+    os.getenv('INGREDIENT_SEARCH_CONTAINS', False) == 'True'
+)
+
+JOBS_EAGER = os.getenv('JOBS_EAGER', False) == 'True'
+JOBS_WORKERS = int(os.getenv('JOBS_WORKERS', 0)) or None
+JOBS_POLL_INTERVAL = float(os.getenv('JOBS_POLL_INTERVAL', 1))
+JOBS_TIMEOUT = int(os.getenv('JOBS_TIMEOUT', 60 * 10))
+JOBS_RESULT_TTL = int(os.getenv('JOBS_RESULT_TTL', 60 * 60 * 24))
+JOBS_RESULT_ROOT = os.getenv('JOBS_RESULT_ROOT', '/var/www/foodgram/jobs')
+
+SERVER_TIMING = os.getenv('SERVER_TIMING', False) == 'True'
+
+# Для JSON-ответов RECIPE_FRAGMENT_TIMEOUT важнее: при обоих
+# включённых лента собирается из готового JSON рецептов.
+RECIPE_LIST_FAST_PATH = os.getenv('RECIPE_LIST_FAST_PATH', False) == 'True'
+
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'collected_static'
 
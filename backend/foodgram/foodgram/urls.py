@@ -3,10 +3,14 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/', include('users.urls')),
     path('api/', include('recipes.urls')),
+    path('api/', include('jobs.urls')),
 ]
 
 if settings.DEBUG:
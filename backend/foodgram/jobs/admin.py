@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'owner', 'status', 'created', 'finished')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('started', 'finished', 'attempts', 'error')
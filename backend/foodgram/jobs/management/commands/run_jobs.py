@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from foodgram.constants import JOB_CLEANUP_INTERVAL
+from jobs.worker import (claim, delete_expired, fail, init_process,
+                         requeue_stale, run_in_process)
+
+
+class Command(BaseCommand):
+    help = 'Обработчик фоновых задач на пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.JOBS_WORKERS or os.cpu_count())
+        parser.add_argument('--poll-interval', type=float,
+                            default=settings.JOBS_POLL_INTERVAL)
+        parser.add_argument('--once', action='store_true',
+                            help='выполнить очередь и завершиться')
+
+    def create_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_process
+        )
+
+    def cleanup(self):
+        requeue_stale(settings.JOBS_TIMEOUT)
+        deleted = delete_expired(settings.JOBS_RESULT_TTL)
+        if deleted:
+            self.stdout.write(f'Удалено устаревших задач: {deleted}')
+
+    def collect(self, running, done):
+        """ Итоги завершённых задач; False, если пул процессов упал. """
+
+        healthy = True
+        for future in done:
+            job_id = running.pop(future)
+            try:
+                job_id, status = future.result()
+            except Exception as error:
+                # Процесс пула упал или не смог сохранить итог.
+                broken = isinstance(error, BrokenProcessPool)
+                healthy &= not broken
+                job_id, status = fail(job_id, ''.join(
+                    traceback.format_exception(
+                        type(error), error, error.__traceback__
+                    )
+                ), retry=broken)
+            self.stdout.write(f'Задача {job_id}: {status}')
+        return healthy
+
+    def handle(self, *args, **options):
+        self.workers = options['workers']
+        # {future: id задачи}
+        running = {}
+        executor = self.create_executor()
+        cleaned = None
+        self.stdout.write(f'Обработчик задач запущен, процессов: '
+                          f'{self.workers}')
+        try:
+            while True:
+                close_old_connections()
+                if (cleaned is None
+                        or time.monotonic() - cleaned > JOB_CLEANUP_INTERVAL):
+                    self.cleanup()
+                    cleaned = time.monotonic()
+                if len(running) < self.workers:
+                    for job_id in claim(self.workers - len(running)):
+                        running[executor.submit(run_in_process,
+                                                job_id)] = job_id
+                if not running:
+                    if options['once']:
+                        return
+                    time.sleep(options['poll_interval'])
+                    continue
+                done, _ = wait(running,
+                               timeout=options['poll_interval'],
+                               return_when=FIRST_COMPLETED)
+                if not self.collect(running, done):
+                    # Упавший пул отменяет все свои задачи.
+                    self.collect(running, wait(running).done)
+                    executor.shutdown(wait=False)
+                    executor = self.create_executor()
+        finally:
+            executor.shutdown()
@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-18 11:02
+
+from django.db import migrations, models
+import jobs.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_attempts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='result',
+            field=models.FileField(blank=True, storage=jobs.models.result_storage, upload_to='', verbose_name='результат'),
+        ),
+    ]
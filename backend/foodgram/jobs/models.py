@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+from users.models import User
+
+
+def result_storage():
+    """ Результаты задач лежат вне MEDIA_ROOT: их отдаёт только API. """
+
+    return FileSystemStorage(location=settings.JOBS_RESULT_ROOT)
+
+
+class Job(models.Model):
+    """ Фоновая задача. """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'в очереди'
+        RUNNING = 'running', 'выполняется'
+        DONE = 'done', 'готово'
+        FAILED = 'failed', 'ошибка'
+
+    kind = models.CharField('тип', max_length=50)
+    owner = models.ForeignKey(
+        User,
+        verbose_name='пользователь',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    payload = models.JSONField('параметры', default=dict, blank=True)
+    status = models.CharField('статус',
+                              max_length=10,
+                              choices=Status.choices,
+                              default=Status.PENDING)
+    result = models.FileField('результат',
+                              storage=result_storage,
+                              blank=True)
+    error = models.TextField('ошибка', blank=True)
+    attempts = models.PositiveSmallIntegerField('попыток', default=0)
+    created = models.DateTimeField('создана', auto_now_add=True)
+    started = models.DateTimeField('запущена', null=True, blank=True)
+    finished = models.DateTimeField('завершена', null=True, blank=True)
+
+    class Meta:
+        default_related_name = 'jobs'
+        ordering = ('-created',)
+        indexes = (
+            models.Index(fields=('status', 'created'),
+                         name='job_queue_idx'),
+        )
+        verbose_name = 'задача'
+        verbose_name_plural = 'Задачи'
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk}: {self.get_status_display()}'
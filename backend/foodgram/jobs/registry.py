@@ -0,0 +1,32 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+HANDLERS = {}
+
+
+def register(kind):
+    """ Регистрирует обработчик задач данного типа. """
+
+    def decorator(handler):
+        HANDLERS[kind] = handler
+        return handler
+    return decorator
+
+
+def enqueue(kind, owner=None, **payload):
+    """ Ставит задачу в очередь; при JOBS_EAGER выполняет сразу.
+
+    Внутри транзакции задача выполняется после её фиксации,
+    вне транзакции — немедленно.
+    """
+
+    from .models import Job
+    from .worker import run_job
+
+    job = Job.objects.create(kind=kind, owner=owner, payload=payload)
+    if settings.JOBS_EAGER:
+        transaction.on_commit(partial(run_job, job.pk))
+        job.refresh_from_db()
+    return job
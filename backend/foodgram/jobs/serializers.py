@@ -0,0 +1,27 @@
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """ Состояние задачи и ссылка на результат. """
+
+    url = serializers.SerializerMethodField()
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ('id', 'kind', 'status', 'created', 'finished',
+                  'error', 'url', 'download')
+        read_only_fields = ('__all__',)
+
+    def get_url(self, obj):
+        return reverse('jobs-detail', args=(obj.pk,),
+                       request=self.context.get('request'))
+
+    def get_download(self, obj):
+        if obj.status != Job.Status.DONE or not obj.result:
+            return None
+        return reverse('jobs-download', args=(obj.pk,),
+                       request=self.context.get('request'))
@@ -0,0 +1,11 @@
+from django.urls import include, path
+from rest_framework import routers
+
+from .views import JobViewSet
+
+router = routers.DefaultRouter()
+router.register(r'jobs', JobViewSet, basename='jobs')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
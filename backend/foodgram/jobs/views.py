@@ -0,0 +1,27 @@
+from django.http import FileResponse
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from .models import Job
+from .serializers import JobSerializer
+from foodgram.constants import JOB_NOT_READY, SHOPPING_LIST_FILENAME
+
+
+class JobViewSet(mixins.RetrieveModelMixin, GenericViewSet):
+    serializer_class = JobSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return Job.objects.filter(owner=self.request.user)
+
+    @action(detail=True, url_path='download')
+    def download(self, request, pk):
+        job = self.get_object()
+        if job.status != Job.Status.DONE or not job.result:
+            return Response(JOB_NOT_READY, status=status.HTTP_409_CONFLICT)
+        return FileResponse(job.result.open('rb'),
+                            as_attachment=True,
+                            filename=SHOPPING_LIST_FILENAME)
@@ -0,0 +1,123 @@
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from foodgram.constants import JOB_MAX_ATTEMPTS, JOB_TIMED_OUT
+
+# Модуль загружается в дочерних процессах до django.setup(),
+# поэтому модели импортируются внутри функций.
+
+
+def init_process():
+    """ Инициализация Django в дочернем процессе пула. """
+
+    import django
+    django.setup()
+
+
+def requeue_stale(timeout):
+    """ Задачи, выполняющиеся дольше timeout секунд, — процесс упал.
+
+    Их возвращают в очередь, а после JOB_MAX_ATTEMPTS попыток
+    помечают ошибкой.
+    """
+
+    from .models import Job
+
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        started__lt=timezone.now() - timedelta(seconds=timeout)
+    )
+    stale.filter(attempts__gte=JOB_MAX_ATTEMPTS).update(
+        status=Job.Status.FAILED,
+        error=JOB_TIMED_OUT.format(timeout=timeout),
+        finished=timezone.now()
+    )
+    stale.update(status=Job.Status.PENDING, started=None)
+
+
+def claim(limit):
+    """ Забирает до limit задач из очереди и помечает их запущенными. """
+
+    from .models import Job
+
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.PENDING)
+            .order_by('created')
+            .values_list('pk', flat=True)[:limit]
+        )
+        Job.objects.filter(pk__in=ids).update(status=Job.Status.RUNNING,
+                                              started=timezone.now(),
+                                              attempts=F('attempts') + 1)
+    return ids
+
+
+def finish(job, error=''):
+    from .models import Job
+
+    job.status = Job.Status.FAILED if error else Job.Status.DONE
+    job.error = error
+    job.finished = timezone.now()
+    job.save(update_fields=('status', 'error', 'finished', 'result'))
+    return job.pk, job.status
+
+
+def run_job(job_id):
+    """ Выполняет задачу и сохраняет результат или ошибку. """
+
+    from .models import Job
+    from .registry import HANDLERS
+
+    job = Job.objects.get(pk=job_id)
+    try:
+        HANDLERS[job.kind](job)
+    except Exception:
+        return finish(job, traceback.format_exc())
+    return finish(job)
+
+
+def run_in_process(job_id):
+    """ run_job в процессе пула: соединения с БД живут между задачами. """
+
+    close_old_connections()
+    try:
+        return run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def fail(job_id, error, retry=False):
+    """ Задача, упавшая вместе с процессом пула.
+
+    При retry она возвращается в очередь, пока не исчерпаны попытки:
+    пул падает целиком, и соседние задачи ни в чём не виноваты.
+    """
+
+    from .models import Job
+
+    job = Job.objects.get(pk=job_id)
+    if retry and job.attempts < JOB_MAX_ATTEMPTS:
+        job.status = Job.Status.PENDING
+        job.started = None
+        job.save(update_fields=('status', 'started'))
+        return job.pk, job.status
+    return finish(job, error)
+
+
+def delete_expired(ttl):
+    """ Удаляет задачи, завершённые больше ttl секунд назад, и их файлы. """
+
+    from .models import Job
+
+    expired = Job.objects.filter(
+        status__in=(Job.Status.DONE, Job.Status.FAILED),
+        finished__lt=timezone.now() - timedelta(seconds=ttl)
+    )
+    for job in expired.exclude(result='').only('pk', 'result').iterator():
+        job.result.delete(save=False)
+    return expired.delete()[0]
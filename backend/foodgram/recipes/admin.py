@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 
+from .images import variant_urls
 from .models import (
     Tag,
     Ingredient,
@@ -10,11 +14,43 @@ from .models import (
     ShoppingCart,
     Subscription
 )
+from .shopping_list import rebuild_shopping_lists
+from foodgram.constants import ADMIN_EXACT_COUNT_LIMIT
+
+
+class EstimatedCountPaginator(Paginator):
+    """ Для большой таблицы без фильтров число строк берётся
+    из статистики PostgreSQL (pg_class.reltuples), а не COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE relname = %s',
+                    (queryset.model._meta.db_table,)
+                )
+                row = cursor.fetchone()
+            if row and row[0] > ADMIN_EXACT_COUNT_LIMIT:
+                return row[0]
+        return super().count
+
+
+class BigTableAdmin(admin.ModelAdmin):
+    """ Таблицы связей: без точного COUNT(*) и выпадающих списков. """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class IngredientInline(admin.TabularInline):
     model = RecipeIngredient
     min_num = 1
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Recipe)
@@ -22,29 +58,44 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = ('get_image',
                     'name',
                     'author',
-                    'favorited_count',
+                    'favorites_count',
                     'ingredients_display')
-    search_fields = ('name', 'author', 'tags')
-    readonly_fields = ('author', 'favorited_count')
+    list_select_related = ('author',)
+    search_fields = ('name', '^author__username', 'tags__name')
+    readonly_fields = ('author', 'favorites_count', 'cart_count')
+    autocomplete_fields = ('tags',)
     inlines = (IngredientInline,)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('ingredients')
+
+    def save_related(self, request, form, formsets, change):
+        """ Инлайн сохраняет ингредиенты по одному — списки покупок
+        с этим рецептом пересобираются целиком.
+        """
+
+        super().save_related(request, form, formsets, change)
+        if change:
+            rebuild_shopping_lists(ShoppingCart.objects.filter(
+                recipe=form.instance
+            ).values('consumer_id'))
+
     @admin.display(description='ингредиенты')
     def ingredients_display(self, obj):
         return ', '.join([i.name for i in obj.ingredients.all()])
 
-    @admin.display(description='Добавлен пользовалями в избранное')
-    def favorited_count(self, obj):
-        return obj.favorites.count()
-
     @admin.display(description='Картинка')
     def get_image(self, obj):
-        return mark_safe(f'<img src={obj.image.url} width="80" height="60">')
+        url = (variant_urls(obj.image, obj.image_variants)
+               .get('admin', {}).get('webp', obj.image.url))
+        return mark_safe(f'<img src={url} width="80" height="60">')
 
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     list_display = ('name',)
     list_filter = ('name', 'color', 'slug')
+    search_fields = ('name', 'slug')
 
 
 @admin.register(Ingredient)
@@ -55,10 +106,25 @@ class IngredientAdmin(admin.ModelAdmin):
 
 
 @admin.register(Favorites, ShoppingCart)
-class FavoritesCartAdmin(admin.ModelAdmin):
-    search_fields = ('consumer', 'recipe')
+class FavoritesCartAdmin(BigTableAdmin):
+    list_display = ('consumer', 'recipe')
+    list_select_related = ('consumer', 'recipe')
+    search_fields = ('^consumer__username', '^recipe__name')
+    autocomplete_fields = ('consumer', 'recipe')
+
+    def get_readonly_fields(self, request, obj=None):
+        """ Строку можно добавить или удалить, но не перенести:
+        счётчики и список покупок следят только за этим.
+        """
+
+        if obj is not None:
+            return ('consumer', 'recipe')
+        return super().get_readonly_fields(request, obj)
 
 
 @admin.register(Subscription)
-class SubscriptionAdmin(admin.ModelAdmin):
-    search_fields = ('subscriber', 'author')
+class SubscriptionAdmin(BigTableAdmin):
+    list_display = ('subscriber', 'author')
+    list_select_related = ('subscriber', 'author')
+    search_fields = ('^subscriber__username', '^author__username')
+    autocomplete_fields = ('subscriber', 'author')
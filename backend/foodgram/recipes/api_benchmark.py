@@ -0,0 +1,189 @@
+import base64
+import io
+import json
+from collections import namedtuple
+
+from django.urls import reverse
+from PIL import Image
+
+import recipes.urls
+import users.urls
+from .models import Favorites, Ingredient, Recipe, ShoppingCart, Tag
+from .user_lists import add_recipes
+from users.models import User
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+# Рассылающие письма маршруты djoser в замеры не входят.
+SKIPPED_ROUTES = ('users-activation', 'users-resend-activation',
+                  'users-reset-password', 'users-reset-password-confirm',
+                  'users-reset-username', 'users-reset-username-confirm')
+
+Scenario = namedtuple(
+    'Scenario',
+    ('name', 'route', 'method', 'path', 'data', 'authenticated', 'prepare'),
+    defaults=(None, True, None)
+)
+
+
+def api_routes():
+    return {pattern.name
+            for entry in recipes.urls.urlpatterns + users.urls.urlpatterns
+            for pattern in getattr(entry, 'url_patterns', (entry,))}
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (60, 40)).save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+def get_objects():
+    """ Пользователь для замеров и объекты, к которым он обращается.
+
+    Берётся автор последнего рецепта: у него есть что изменять и удалять.
+    None, если чего-то не хватает: рецептов не в избранном и корзине
+    пользователя, автора без его подписки, тега или ингредиентов.
+    """
+
+    recipe = Recipe.objects.order_by('-id').first()
+    if recipe is None:
+        return None
+    user = recipe.author
+    objects = {
+        'user': user,
+        'own_recipe': recipe,
+        'recipes': list(Recipe.objects.exclude(
+            favorites__consumer=user
+        ).exclude(cart_items__consumer=user).order_by('-id')[:10]),
+        'author': User.objects.exclude(
+            subs_author__subscriber=user
+        ).exclude(pk=user.pk).order_by('-recipes_count').first(),
+        'tag': Tag.objects.first(),
+        'ingredients': list(Ingredient.objects.order_by('id')[:5]),
+    }
+    if not all(objects.values()):
+        return None
+    return objects
+
+
+def get_scenarios(objects):
+    """ Запросы к маршрутам recipes.urls и users.urls.
+
+    Чтение проверяется анонимом и пользователем с токеном, изменения —
+    пользователем; prepare() готовит данные для запроса.
+    """
+
+    user = objects['user']
+    recipe = objects['recipes'][0]
+    recipes = {'recipes': [recipe.id for recipe in objects['recipes']]}
+    own_recipe = objects['own_recipe']
+    author = objects['author']
+    recipe_data = {
+        'name': 'Рецепт для замеров',
+        'text': 'Текст',
+        'cooking_time': 10,
+        'image': make_image(),
+        'tags': [objects['tag'].id],
+        'ingredients': [{'id': ingredient.id, 'amount': 10}
+                        for ingredient in objects['ingredients']],
+    }
+    reads = (
+        ('api-root', reverse('api-root')),
+        ('tags-list', reverse('tags-list')),
+        ('tags-detail', reverse('tags-detail', args=(objects['tag'].id,))),
+        ('ingredients-list', reverse('ingredients-list') + '?name=с'),
+        ('ingredients-detail',
+         reverse('ingredients-detail', args=(objects['ingredients'][0].id,))),
+        ('recipes-list', reverse('recipes-list')),
+        ('recipes-list',
+         reverse('recipes-list') + f'?tags={objects["tag"].slug}'),
+        ('recipes-list', reverse('recipes-list') + f'?author={author.id}'),
+        ('recipes-detail', reverse('recipes-detail', args=(recipe.id,))),
+        ('users-list', reverse('users-list')),
+        ('users-detail', reverse('users-detail', args=(author.id,))),
+    )
+    scenarios = [
+        Scenario(f'GET {path} ({"токен" if authenticated else "аноним"})',
+                 route, 'get', path, authenticated=authenticated)
+        for route, path in reads
+        for authenticated in (False, True)
+    ]
+    favorite = reverse('recipes-favorite', args=(recipe.id,))
+    cart = reverse('recipes-shopping-cart', args=(recipe.id,))
+    subscribe = reverse('users-subscribe', args=(author.id,))
+    scenarios.extend((
+        Scenario('GET recipes?is_favorited=1', 'recipes-list', 'get',
+                 reverse('recipes-list') + '?is_favorited=1'),
+        Scenario('GET recipes?is_in_shopping_cart=1', 'recipes-list', 'get',
+                 reverse('recipes-list') + '?is_in_shopping_cart=1'),
+        Scenario('GET users/me', 'users-me', 'get', reverse('users-me')),
+        Scenario('GET users/subscriptions', 'users-subscriptions', 'get',
+                 reverse('users-subscriptions') + '?recipes_limit=3'),
+        Scenario('GET download_shopping_cart',
+                 'recipes-download-shopping-cart', 'get',
+                 reverse('recipes-download-shopping-cart')),
+        Scenario('POST download_shopping_cart',
+                 'recipes-download-shopping-cart', 'post',
+                 reverse('recipes-download-shopping-cart')),
+        Scenario('POST recipes', 'recipes-list', 'post',
+                 reverse('recipes-list'), recipe_data),
+        Scenario('PATCH recipes/id', 'recipes-detail', 'patch',
+                 reverse('recipes-detail', args=(own_recipe.id,)),
+                 {**recipe_data, 'image': None}),
+        Scenario('DELETE recipes/id', 'recipes-detail', 'delete',
+                 reverse('recipes-detail', args=(own_recipe.id,))),
+        Scenario('POST favorite', 'recipes-favorite', 'post', favorite),
+        Scenario('DELETE favorite', 'recipes-favorite', 'delete', favorite,
+                 prepare=lambda: Favorites.objects.create(consumer=user,
+                                                          recipe=recipe)),
+        Scenario('POST shopping_cart', 'recipes-shopping-cart', 'post',
+                 cart),
+        Scenario('DELETE shopping_cart', 'recipes-shopping-cart', 'delete',
+                 cart,
+                 prepare=lambda: ShoppingCart.objects.create(consumer=user,
+                                                             recipe=recipe)),
+        Scenario('POST favorite (пакет)', 'recipes-favorite-many', 'post',
+                 reverse('recipes-favorite-many'), recipes),
+        Scenario('DELETE favorite (пакет)', 'recipes-favorite-many', 'delete',
+                 reverse('recipes-favorite-many'), recipes,
+                 prepare=lambda: add_recipes(Favorites, user,
+                                             objects['recipes'])),
+        Scenario('POST shopping_cart (пакет)', 'recipes-shopping-cart-many',
+                 'post', reverse('recipes-shopping-cart-many'), recipes),
+        Scenario('DELETE shopping_cart (пакет)',
+                 'recipes-shopping-cart-many', 'delete',
+                 reverse('recipes-shopping-cart-many'), recipes,
+                 prepare=lambda: add_recipes(ShoppingCart, user,
+                                             objects['recipes'])),
+        Scenario('POST subscribe', 'users-subscribe', 'post', subscribe),
+        Scenario('DELETE subscribe', 'users-subscribe', 'delete', subscribe,
+                 prepare=lambda: user.subs_subscriber.create(author=author)),
+        Scenario('POST users', 'users-list', 'post', reverse('users-list'),
+                 {'email': 'benchmark@example.com',
+                  'username': 'benchmark',
+                  'first_name': 'Имя',
+                  'last_name': 'Фамилия',
+                  'password': BENCHMARK_PASSWORD},
+                 authenticated=False),
+        Scenario('POST users/set_password', 'users-set-password', 'post',
+                 reverse('users-set-password'),
+                 {'current_password': BENCHMARK_PASSWORD,
+                  'new_password': BENCHMARK_PASSWORD + '-new'}),
+        Scenario('POST users/set_username', 'users-set-username', 'post',
+                 reverse('users-set-username'),
+                 {'current_password': BENCHMARK_PASSWORD,
+                  f'new_{User.USERNAME_FIELD}': 'benchmark@example.com'}),
+        Scenario('POST auth/token/login', 'login', 'post', reverse('login'),
+                 {'email': user.email, 'password': BENCHMARK_PASSWORD},
+                 authenticated=False),
+        Scenario('POST auth/token/logout', 'logout', 'post',
+                 reverse('logout')),
+    ))
+    return scenarios
+
+
+def encode(data):
+    return None if data is None else json.dumps(
+        {key: value for key, value in data.items() if value is not None}
+    )
@@ -0,0 +1,78 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from .versions import get_version
+from foodgram.constants import (RECIPE_CACHE_HITS,
+                                RECIPE_CACHE_KEY,
+                                RECIPE_CACHE_MISSES,
+                                RECIPE_CACHE_PARAMS,
+                                RECIPES_VERSION)
+
+
+def get_cache_key(request, action, pk=None):
+    """ Ключ ответа: версия каталога, действие и нормализованные параметры.
+
+    Посторонние параметры не учитываются, значения списков
+    (несколько tags) сортируются.
+    """
+
+    params = '&'.join(
+        f'{name}={",".join(sorted(request.query_params.getlist(name)))}'
+        for name in RECIPE_CACHE_PARAMS
+        if name in request.query_params
+    )
+    return RECIPE_CACHE_KEY.format(
+        version=get_version(RECIPES_VERSION),
+        action=action,
+        pk=pk,
+        digest=hashlib.md5(
+            f'{request.get_host()}?{params}'.encode()
+        ).hexdigest()
+    )
+
+
+def count(key):
+    """ Счётчик попаданий/промахов при RECIPE_CACHE_STATS. """
+
+    if not settings.RECIPE_CACHE_STATS:
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_stats():
+    stats = cache.get_many((RECIPE_CACHE_HITS, RECIPE_CACHE_MISSES))
+    return (stats.get(RECIPE_CACHE_HITS, 0),
+            stats.get(RECIPE_CACHE_MISSES, 0))
+
+
+def cached_for_anonymous(handler, request, action, pk=None):
+    """ Ответ анонимному пользователю из кэша или из handler(). """
+
+    if (request.user.is_authenticated
+            or not settings.RECIPE_CACHE_TIMEOUT):
+        return handler()
+    key = get_cache_key(request, action, pk)
+    data = cache.get(key)
+    if isinstance(data, bytes) and request.accepted_renderer.format == 'json':
+        count(RECIPE_CACHE_HITS)
+        return HttpResponse(data, content_type='application/json')
+    if data is not None and not isinstance(data, bytes):
+        count(RECIPE_CACHE_HITS)
+        return Response(data)
+    count(RECIPE_CACHE_MISSES)
+    response = handler()
+    if response.status_code == status.HTTP_200_OK:
+        # Ответ из готового JSON (recipes.fragments) кэшируется байтами.
+        cache.set(key,
+                  (response.data if isinstance(response, Response)
+                   else response.content),
+                  settings.RECIPE_CACHE_TIMEOUT)
+    return response
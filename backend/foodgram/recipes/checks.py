@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """ Версии справочников живут в кэше и должны быть общими.
+
+    Изменение из run_jobs, manage.py или другого процесса gunicorn
+    не дойдёт до кэша в памяти процесса, и ответы останутся старыми.
+    """
+
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        'Кэш по умолчанию не общий для процессов: версии справочников '
+        'и закэшированные рецепты разойдутся между процессами.',
+        hint='Укажите CACHE_BACKEND=memcached (или file в общем каталоге).',
+        id='recipes.W001',
+    )]
+
+
+@register()
+def check_recipe_list_switches(app_configs, **kwargs):
+    if not (settings.RECIPE_FRAGMENT_TIMEOUT
+            and settings.RECIPE_LIST_FAST_PATH):
+        return []
+    return [Warning(
+        'Включены и RECIPE_FRAGMENT_TIMEOUT, и RECIPE_LIST_FAST_PATH: '
+        'JSON ленты собирается из готовых фрагментов, .values() '
+        'используется только для остальных форматов.',
+        hint='Оставьте один из способов сборки ленты.',
+        id='recipes.W002',
+    )]
@@ -0,0 +1,67 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Favorites, Recipe, ShoppingCart, Subscription
+from users.models import User
+
+# (модель со счётчиком, поле счётчика, модель строк, внешний ключ)
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorites, 'recipe'),
+    (Recipe, 'cart_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Subscription, 'author'),
+)
+
+
+def change_counter(model, pk, field, delta):
+    """ Атомарное изменение счётчика через F(), без гонок между запросами.
+
+    Счётчик не опускается ниже нуля, даже если успел разойтись с данными.
+    """
+
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+def actual_count(source, foreign_key):
+    return Coalesce(
+        Subquery(
+            source.objects.filter(
+                **{foreign_key: OuterRef('pk')}
+            ).order_by().values(foreign_key).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        Value(0)
+    )
+
+
+def reconcile_counters():
+    """ Пересчитывает разошедшиеся счётчики; возвращает {поле: исправлено}. """
+
+    fixed = {}
+    for model, field, source, foreign_key in COUNTERS:
+        drifted = model.objects.annotate(
+            actual=actual_count(source, foreign_key)
+        ).exclude(**{field: F('actual')}).values('pk')
+        fixed[f'{model._meta.model_name}.{field}'] = (
+            model.objects.filter(pk__in=drifted).update(
+                **{field: actual_count(source, foreign_key)}
+            )
+        )
+    return fixed
+
+
+def change_counters(source, pks, delta):
+    """ Счётчики по строкам source у объектов pks меняются на delta.
+
+    Нужен там, где строки добавляются и удаляются пачкой в обход
+    сигналов: у каждого объекта из pks ровно одна строка.
+    """
+
+    for model, field, counter_source, _ in COUNTERS:
+        if counter_source is source:
+            model.objects.filter(pk__in=pks).update(
+                **{field: Greatest(F(field) + delta, Value(0))}
+            )
@@ -1,6 +1,11 @@
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from django_filters import FilterSet, filters
 
-from .models import Recipe
+from .models import Favorites, Recipe, ShoppingCart, Tag
+from .search import search_recipes
+from .versions import get_version
+from foodgram.constants import TAG_IDS_KEY, TAGS_VERSION
 
 
 BOOLEAN_CHOICES = (
@@ -9,12 +14,33 @@ BOOLEAN_CHOICES = (
 )
 
 
+def get_tag_ids():
+    """ {слаг: id} всех тегов, кэшируется до изменения тегов. """
+
+    key = TAG_IDS_KEY.format(get_version(TAGS_VERSION))
+    tag_ids = cache.get(key)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(key, tag_ids, None)
+    return tag_ids
+
+
+class TagSlugsFilter(filters.MultipleChoiceFilter):
+    """ Выбор из слагов тегов без запроса к БД на каждый запрос. """
+
+    @property
+    def field(self):
+        self.extra['choices'] = [(slug, slug) for slug in get_tag_ids()]
+        return super().field
+
+
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = TagSlugsFilter(method='filter_tags')
     is_favorited = filters.ChoiceFilter(choices=BOOLEAN_CHOICES,
                                         method='filter_favorited')
     is_in_shopping_cart = filters.ChoiceFilter(choices=BOOLEAN_CHOICES,
                                                method='filter_shopping_cart')
+    search = filters.CharFilter(method='filter_search')
 
     # Изменил на Boolean, теперь воспринимает только значения True/False.
 
@@ -28,14 +54,33 @@ class RecipeFilter(FilterSet):
                   'is_in_shopping_cart',
                   'author')
 
-    def filter_favorited(self, queryset, name, value):
+    def filter_tags(self, queryset, name, value):
+        tag_ids = get_tag_ids()
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'),
+            tag_id__in=[tag_ids[slug] for slug in value]
+        )))
+
+    def filter_consumer_rows(self, queryset, model, value):
+        """ Рецепты из избранного или корзины через EXISTS, без JOIN. """
+
+        if value != '1':
+            return queryset
         user = self.request.user
-        if value == '1':
-            return queryset.filter(favorites__consumer=user)
-        return queryset
+        if not user.is_authenticated:
+            return queryset.none()
+        return queryset.filter(Exists(model.objects.filter(
+            consumer=user, recipe=OuterRef('pk')
+        )))
+
+    def filter_favorited(self, queryset, name, value):
+        return self.filter_consumer_rows(queryset, Favorites, value)
 
     def filter_shopping_cart(self, queryset, name, value):
-        user = self.request.user
-        if value == '1':
-            return queryset.filter(cart_items__consumer=user)
+        return self.filter_consumer_rows(queryset, ShoppingCart, value)
+
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if value:
+            return search_recipes(queryset, value)
         return queryset
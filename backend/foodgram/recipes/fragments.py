@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from .models import Recipe
+from .serializers import RecipeGetSerializer
+from .versions import get_versions
+from foodgram.constants import (AUTHOR_VERSION,
+                                INGREDIENTS_VERSION,
+                                RECIPE_FRAGMENT_KEY,
+                                RECIPE_VERSION,
+                                TAGS_VERSION)
+from users.serializers import get_subscribed_ids
+
+FRAGMENT_ROW_FIELDS = ('id', 'author_id', 'pub_date', 'is_favorited',
+                       'is_in_shopping_cart')
+# Поля, зависящие от пользователя, в порядке их следования в JSON.
+USER_FLAGS = (b'"is_subscribed":', b'"is_favorited":',
+              b'"is_in_shopping_cart":')
+JSON_BOOLEANS = {False: b'false', True: b'true'}
+
+
+def fragment_rows(queryset):
+    """ Только id рецептов и флаги пользователя, без связанных объектов. """
+
+    return queryset.prefetch_related(None).values(*FRAGMENT_ROW_FIELDS)
+
+
+def split_fragment(body):
+    """ JSON рецепта, разрезанный по значениям USER_FLAGS.
+
+    Ключ с кавычками перед двоеточием встречается в JSON только как
+    настоящий ключ: в строках кавычки экранированы.
+    """
+
+    chunks = []
+    for flag in USER_FLAGS:
+        head, _, body = body.partition(flag + JSON_BOOLEANS[False])
+        chunks.append(head + flag)
+    chunks.append(body)
+    return chunks
+
+
+def render_fragments(recipe_ids):
+    """ JSON рецептов из RecipeGetSerializer для анонима. """
+
+    recipes = Recipe.objects.with_related().with_user_flags(
+        AnonymousUser()
+    ).filter(pk__in=recipe_ids)
+    renderer = JSONRenderer()
+    return {data['id']: split_fragment(renderer.render(data))
+            for data in RecipeGetSerializer(recipes, many=True).data}
+
+
+def get_fragment_keys(rows):
+    names = {TAGS_VERSION, INGREDIENTS_VERSION}
+    for row in rows:
+        names.add(RECIPE_VERSION.format(row['id']))
+        names.add(AUTHOR_VERSION.format(row['author_id']))
+    versions = get_versions(names)
+    return {
+        row['id']: RECIPE_FRAGMENT_KEY.format(
+            versions[TAGS_VERSION],
+            versions[INGREDIENTS_VERSION],
+            row['id'],
+            versions[RECIPE_VERSION.format(row['id'])],
+            versions[AUTHOR_VERSION.format(row['author_id'])]
+        )
+        for row in rows
+    }
+
+
+def get_fragments(rows):
+    """ {id рецепта: части JSON}; недостающие рендерятся и кэшируются. """
+
+    keys = get_fragment_keys(rows)
+    cached = cache.get_many(keys.values())
+    fragments = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = keys.keys() - fragments.keys()
+    if missing:
+        rendered = render_fragments(missing)
+        cache.set_many({keys[pk]: chunks for pk, chunks in rendered.items()},
+                       settings.RECIPE_FRAGMENT_TIMEOUT)
+        fragments.update(rendered)
+    return fragments
+
+
+def render_recipes(rows, request):
+    """ JSON рецептов из rows с флагами текущего пользователя. """
+
+    fragments = get_fragments(rows)
+    subscribed_ids = get_subscribed_ids(request)
+    recipes = []
+    for row in rows:
+        chunks = fragments.get(row['id'])
+        if chunks is None:
+            # Рецепт удалён после выборки страницы.
+            continue
+        flags = (row['author_id'] in subscribed_ids,
+                 bool(row['is_favorited']),
+                 bool(row['is_in_shopping_cart']))
+        recipes.append(b''.join((
+            chunks[0], JSON_BOOLEANS[flags[0]],
+            chunks[1], JSON_BOOLEANS[flags[1]],
+            chunks[2], JSON_BOOLEANS[flags[2]],
+            chunks[3]
+        )))
+    return recipes
@@ -0,0 +1,64 @@
+import io
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from foodgram.constants import (IMAGE_VARIANT_FORMATS,
+                                IMAGE_VARIANT_QUALITY,
+                                IMAGE_VARIANT_SIZES,
+                                IMAGE_VARIANTS_DIR)
+
+
+def encode(image, image_format):
+    buffer = io.BytesIO()
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(buffer,
+               image_format,
+               quality=IMAGE_VARIANT_QUALITY,
+               optimize=image_format == 'JPEG')
+    return buffer.getvalue()
+
+
+def build_variants(image_field, owner, old_variants=None):
+    """ Уменьшенные копии картинки во всех размерах и форматах.
+
+    Копии лежат в каталоге владельца (id рецепта) и перезаписываются
+    при повторном запуске. Из old_variants удаляются только файлы из
+    этого каталога: копии вне его, например общие у заглушек seed,
+    принадлежат не только этому рецепту.
+    Возвращает {размер: {формат: имя файла в хранилище}}.
+    """
+
+    storage = image_field.storage
+    directory = f'{IMAGE_VARIANTS_DIR}/{owner}/'
+    with image_field.open('rb') as file:
+        original = Image.open(file)
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA')
+        original.load()
+    variants = {}
+    for size_name, size in IMAGE_VARIANT_SIZES.items():
+        resized = ImageOps.fit(original, size, Image.LANCZOS)
+        variants[size_name] = {}
+        for extension, image_format in IMAGE_VARIANT_FORMATS.items():
+            name = f'{directory}{size_name}.{extension}'
+            storage.delete(name)
+            variants[size_name][extension] = storage.save(
+                name, ContentFile(encode(resized, image_format))
+            )
+    created = {name for names in variants.values() for name in names.values()}
+    for names in (old_variants or {}).values():
+        for name in names.values():
+            if name.startswith(directory) and name not in created:
+                storage.delete(name)
+    return variants
+
+
+def variant_urls(image_field, variants):
+    return {
+        size_name: {extension: image_field.storage.url(name)
+                    for extension, name in names.items()}
+        for size_name, names in variants.items()
+    }
@@ -0,0 +1,23 @@
+from uuid import uuid4
+
+from django.core.files.base import ContentFile
+
+from .models import Recipe
+from .pdf import render_shopping_list
+from .shopping_list import shopping_list_rows
+from foodgram.constants import IMAGE_VARIANTS_JOB, SHOPPING_LIST_JOB
+from jobs.registry import register
+
+
+@register(SHOPPING_LIST_JOB)
+def export_shopping_list(job):
+    job.result.save(
+        f'shopping_list_{uuid4().hex}.pdf',
+        ContentFile(render_shopping_list(shopping_list_rows(job.owner))),
+        save=False
+    )
+
+
+@register(IMAGE_VARIANTS_JOB)
+def make_image_variants(job):
+    Recipe.objects.get(pk=job.payload['recipe_id']).refresh_image_variants()
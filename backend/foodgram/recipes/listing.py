@@ -0,0 +1,85 @@
+from .images import variant_urls
+from .models import Recipe, RecipeIngredient
+from users.models import User
+from users.serializers import get_subscribed_ids
+
+RECIPE_ROW_FIELDS = ('id', 'author_id', 'name', 'image', 'image_variants',
+                     'text', 'cooking_time', 'pub_date', 'is_favorited',
+                     'is_in_shopping_cart')
+AUTHOR_FIELDS = ('email', 'id', 'username', 'first_name', 'last_name')
+
+
+def recipe_rows(queryset):
+    """ Рецепты ленты плоскими строками, без связанных объектов. """
+
+    return queryset.prefetch_related(None).values(*RECIPE_ROW_FIELDS)
+
+
+def get_tags(recipe_ids):
+    """ {id рецепта: [тег]}; словарь тега общий для всех рецептов. """
+
+    tags = {}
+    by_recipe = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, *tag in Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('tag_id').values_list('recipe_id', 'tag_id', 'tag__name',
+                                     'tag__color', 'tag__slug'):
+        tag_id, name, color, slug = tag
+        if tag_id not in tags:
+            tags[tag_id] = {'id': tag_id, 'name': name,
+                            'color': color, 'slug': slug}
+        by_recipe[recipe_id].append(tags[tag_id])
+    return by_recipe
+
+
+def get_ingredients(recipe_ids):
+    by_recipe = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, ingredient_id, name, unit, amount in (
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by('id')
+        .values_list('recipe_id', 'ingredient_id', 'ingredient__name',
+                     'ingredient__measurement_unit', 'amount')
+    ):
+        by_recipe[recipe_id].append({'id': ingredient_id,
+                                     'name': name,
+                                     'measurement_unit': unit,
+                                     'amount': amount})
+    return by_recipe
+
+
+def get_authors(author_ids, request):
+    subscribed_ids = get_subscribed_ids(request)
+    return {
+        author['id']: {**author,
+                       'is_subscribed': author['id'] in subscribed_ids}
+        for author in User.objects.filter(
+            pk__in=author_ids
+        ).values(*AUTHOR_FIELDS)
+    }
+
+
+def recipe_list_data(rows, request):
+    """ Тот же JSON, что у RecipeGetSerializer(many=True), из строк
+    recipe_rows(): теги, ингредиенты и авторы страницы читаются
+    тремя запросами, словари тегов и авторов общие для рецептов.
+    """
+
+    recipe_ids = [row['id'] for row in rows]
+    tags = get_tags(recipe_ids)
+    ingredients = get_ingredients(recipe_ids)
+    authors = get_authors({row['author_id'] for row in rows}, request)
+    image_field = Recipe._meta.get_field('image')
+    return [
+        {'id': row['id'],
+         'tags': tags[row['id']],
+         'author': authors[row['author_id']],
+         'ingredients': ingredients[row['id']],
+         'is_favorited': bool(row['is_favorited']),
+         'is_in_shopping_cart': bool(row['is_in_shopping_cart']),
+         'name': row['name'],
+         'image': image_field.storage.url(row['image']),
+         'image_variants': variant_urls(image_field, row['image_variants']),
+         'text': row['text'],
+         'cooking_time': row['cooking_time']}
+        for row in rows
+    ]
@@ -0,0 +1,136 @@
+import csv
+import json
+import re
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Ingredient, Tag
+from .versions import bump_version
+from foodgram.constants import (INGREDIENTS_VERSION,
+                                RECIPES_VERSION,
+                                TAGS_VERSION)
+
+LOADERS = {
+    'ingredients': (Ingredient, ('name', 'measurement_unit'),
+                    INGREDIENTS_VERSION),
+    'tags': (Tag, ('name', 'color', 'slug'), TAGS_VERSION),
+}
+JSON_READ_SIZE = 1 << 16
+JSON_SEPARATORS = re.compile(r'[\s,]*')
+
+
+class LoaderError(Exception):
+    pass
+
+
+def read_csv(path, fields):
+    """ Строки CSV как (место в файле, {поле: значение}). """
+
+    with open(path, encoding='utf-8', newline='') as file:
+        for line, row in enumerate(csv.reader(file), 1):
+            if len(row) != len(fields):
+                raise LoaderError(
+                    f'{path}:{line}: ожидалось колонок {len(fields)}, '
+                    f'получено {len(row)}'
+                )
+            yield f'{path}:{line}', dict(zip(fields, row))
+
+
+def read_json(path, fields):
+    """ Потоковое чтение JSON-массива объектов без загрузки файла целиком. """
+
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as file:
+        buffer = file.read(JSON_READ_SIZE)
+        position = JSON_SEPARATORS.match(buffer).end()
+        if buffer[position:position + 1] != '[':
+            raise LoaderError(f'{path}: ожидался JSON-массив')
+        position += 1
+        index = 0
+        while True:
+            position = JSON_SEPARATORS.match(buffer, position).end()
+            if buffer.startswith(']', position):
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                chunk = file.read(JSON_READ_SIZE)
+                if not chunk:
+                    raise LoaderError(f'{path}: некорректный JSON')
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            try:
+                row = {field: item[field] for field in fields}
+            except (KeyError, TypeError):
+                raise LoaderError(f'{path}: в записи {item!r} нужны поля '
+                                  f'{", ".join(fields)}')
+            yield f'{path}[{index}]', row
+            index += 1
+
+
+def read_rows(path, fields):
+    if Path(path).suffix.lower() == '.json':
+        return read_json(path, fields)
+    return read_csv(path, fields)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def clean_row(model, row):
+    """ Проверки полей модели (обязательность, max_length, валидаторы)
+    до bulk_create: иначе длинная строка обрывает загрузку DataError.
+    """
+
+    errors = []
+    for name, value in row.items():
+        field = model._meta.get_field(name)
+        try:
+            row[name] = field.clean(value, None)
+        except ValidationError as error:
+            errors.extend(f'{name}: {message}' for message in error.messages)
+    if errors:
+        raise ValidationError(errors)
+    return row
+
+
+def load(kind, path, chunk_size):
+    """ Загрузка справочника пачками; существующие записи пропускаются.
+
+    Строки, не прошедшие проверки полей, тоже пропускаются.
+    Возвращает (прочитано строк, добавлено строк,
+    [(место в файле, ошибки)] для отклонённых строк).
+    """
+
+    model, fields, version = LOADERS[kind]
+    read = 0
+    rejected = []
+
+    def valid_rows():
+        for where, row in read_rows(path, fields):
+            try:
+                yield clean_row(model, row)
+            except ValidationError as error:
+                rejected.append((where, error.messages))
+
+    with transaction.atomic():
+        before = model.objects.count()
+        for chunk in chunked(valid_rows(), chunk_size):
+            model.objects.bulk_create(
+                (model(**row) for row in chunk),
+                batch_size=chunk_size,
+                ignore_conflicts=True
+            )
+            read += len(chunk)
+        inserted = model.objects.count() - before
+    if inserted:
+        bump_version(version)
+        bump_version(RECIPES_VERSION)
+    return read + len(rejected), inserted, rejected
@@ -0,0 +1,172 @@
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from foodgram.metrics import QueryTimer
+from recipes.api_benchmark import (BENCHMARK_PASSWORD, SKIPPED_ROUTES,
+                                   api_routes, encode, get_objects,
+                                   get_scenarios)
+from recipes.seed import Seeder
+
+# Метрики, рост которых считается регрессией.
+COMPARED = ('p95_ms', 'queries')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Замеры всех маршрутов API через тестовый клиент: задержки, '
+            'запросы к БД, время БД и память')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=30,
+                            help='повторов каждого запроса')
+        parser.add_argument('--seed', type=float, metavar='SCALE',
+                            help='сначала добавить синтетические данные, '
+                                 'они откатываются вместе с замерами')
+        parser.add_argument('--output', help='записать результаты в JSON')
+        parser.add_argument('--compare', help='JSON прошлого запуска')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='допустимый рост p95 и числа запросов')
+        parser.add_argument('--filter', default='',
+                            help='только сценарии с этой подстрокой')
+
+    def request(self, client, scenario, headers):
+        """ Один запрос внутри точки сохранения, изменения откатываются. """
+
+        try:
+            with transaction.atomic():
+                if scenario.prepare:
+                    scenario.prepare()
+                queries = QueryTimer()
+                with connection.execute_wrapper(queries):
+                    start = time.perf_counter()
+                    response = getattr(client, scenario.method)(
+                        scenario.path,
+                        encode(scenario.data),
+                        content_type='application/json',
+                        **(headers if scenario.authenticated else {})
+                    )
+                    elapsed = time.perf_counter() - start
+                    if hasattr(response, 'streaming_content'):
+                        b''.join(response.streaming_content)
+                raise Rollback
+        except Rollback:
+            pass
+        return response.status_code, elapsed, queries.count, queries.time
+
+    def measure(self, client, scenario, headers, repeat):
+        self.request(client, scenario, headers)
+        latencies = []
+        for _ in range(repeat):
+            status, elapsed, queries, db_time = self.request(
+                client, scenario, headers
+            )
+            latencies.append(elapsed * 1000)
+        tracemalloc.start()
+        self.request(client, scenario, headers)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        return {
+            'route': scenario.route,
+            'status': status,
+            'p50_ms': round(cuts[49], 2),
+            'p95_ms': round(cuts[94], 2),
+            'p99_ms': round(cuts[98], 2),
+            'queries': queries,
+            'db_ms': round(db_time * 1000, 2),
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+    def regressions(self, results, previous, threshold):
+        for name, result in results.items():
+            for metric in COMPARED:
+                before = previous.get(name, {}).get(metric)
+                if before and result[metric] > before * (1 + threshold):
+                    yield (f'{name}: {metric} {result[metric]} '
+                           f'(было {before})')
+
+    def run(self, scenarios, repeat):
+        objects = get_objects()
+        user = objects['user']
+        user.set_password(BENCHMARK_PASSWORD)
+        user.save(update_fields=('password',))
+        token, _ = Token.objects.get_or_create(user=user)
+        headers = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+        client = Client()
+        results = {}
+        for scenario in get_scenarios(objects):
+            if scenarios not in scenario.name:
+                continue
+            results[scenario.name] = result = self.measure(
+                client, scenario, headers, repeat
+            )
+            self.stdout.write(
+                f'{scenario.name[:58]:<58} {result["status"]:>4} '
+                f'{result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} '
+                f'{result["p99_ms"]:>8.1f} {result["queries"]:>4} '
+                f'{result["db_ms"]:>7.1f} {result["peak_kib"]:>8.0f}'
+            )
+        return results
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('Нужно хотя бы два повтора')
+        # Всё, включая синтетические данные, токен и пароль, откатывается
+        # после замеров; картинки пишутся во временный каталог.
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            MEDIA_ROOT=media_root,
+            JOBS_EAGER=False
+        ):
+            try:
+                with transaction.atomic():
+                    if options['seed']:
+                        Seeder().run_scaled(options['seed'])
+                    if get_objects() is None:
+                        raise CommandError('Не хватает данных для замеров: '
+                                           'запустите с --seed')
+                    self.stdout.write(
+                        f'{"сценарий":<58} {"код":>4} {"p50, мс":>8} '
+                        f'{"p95, мс":>8} {"p99, мс":>8} {"БД":>4} '
+                        f'{"БД, мс":>7} {"пик, КиБ":>8}'
+                    )
+                    results = self.run(options['filter'], options['requests'])
+                    raise Rollback
+            except Rollback:
+                pass
+        covered = {result['route'] for result in results.values()}
+        uncovered = api_routes() - covered - set(SKIPPED_ROUTES)
+        if uncovered and not options['filter']:
+            self.stdout.write(f'Без замеров: {", ".join(sorted(uncovered))}')
+        if options['output']:
+            Path(options['output']).write_text(json.dumps({
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'requests': options['requests'],
+                'results': results,
+            }, indent=2, ensure_ascii=False) + '\n')
+        if options['compare']:
+            previous = json.loads(
+                Path(options['compare']).read_text()
+            )['results']
+            failures = list(self.regressions(results, previous,
+                                             options['threshold']))
+            if failures:
+                raise CommandError('Регрессии:\n' + '\n'.join(failures))
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
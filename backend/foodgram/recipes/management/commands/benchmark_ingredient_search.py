@@ -0,0 +1,111 @@
+import csv
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from recipes.models import Ingredient
+from recipes.search import get_ingredient_index
+from recipes.serializers import IngredientSerializer
+from recipes.versions import bump_version
+from foodgram.constants import INGREDIENTS_VERSION
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщэюя'
+UNITS = ('г', 'кг', 'мл', 'шт.', 'ст. л.', 'ч. л.', 'по вкусу')
+
+
+class Command(BaseCommand):
+    help = ('Сравнение поиска ингредиентов по префиксу: '
+            'запрос к БД и индекс в памяти')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=settings.BASE_DIR / 'recipes/data/ingredients.csv'
+        )
+        parser.add_argument('--synthetic', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    @staticmethod
+    def synthetic_catalog(size, rnd):
+        return [
+            (''.join(rnd.choice(ALPHABET)
+                     for _ in range(rnd.randint(4, 12)))
+             + f' {i}', rnd.choice(UNITS))
+            for i in range(size)
+        ]
+
+    @staticmethod
+    def timed(func, queries):
+        start = time.perf_counter()
+        for query in queries:
+            func(query)
+        return (time.perf_counter() - start) / len(queries) * 1_000_000
+
+    @staticmethod
+    def db_search(query):
+        return JSONRenderer().render(IngredientSerializer(
+            Ingredient.objects.filter(name__istartswith=query),
+            many=True
+        ).data)
+
+    @staticmethod
+    def search(query, contains=False):
+        """ Как в IngredientViewSet: версия индекса из кэша и поиск. """
+
+        return get_ingredient_index().render(query, contains)
+
+    def run(self, title, catalog, rnd, queries_count):
+        """ Каталог добавляется в транзакции, которая потом откатывается.
+
+        Версия ингредиентов меняется до и после: индексы в памяти
+        процессов не переживут откат с лишними строками.
+        """
+
+        with transaction.atomic():
+            Ingredient.objects.bulk_create(
+                (Ingredient(name=name, measurement_unit=unit)
+                 for name, unit in catalog),
+                batch_size=5000,
+                ignore_conflicts=True
+            )
+            bump_version(INGREDIENTS_VERSION)
+            start = time.perf_counter()
+            index = get_ingredient_index()
+            build_ms = (time.perf_counter() - start) * 1000
+            names = [name for name, _ in catalog]
+            queries = [
+                rnd.choice(names)[:rnd.randint(1, 3)]
+                for _ in range(queries_count)
+            ]
+            db_us = self.timed(self.db_search, queries)
+            prefix_us = self.timed(self.search, queries)
+            contains_us = self.timed(
+                lambda query: self.search(query, contains=True), queries
+            )
+            transaction.set_rollback(True)
+        bump_version(INGREDIENTS_VERSION)
+        self.stdout.write(
+            f'{title}: {len(index)} строк, индекс построен '
+            f'за {build_ms:.0f} мс\n'
+            f'  БД (istartswith + сериализатор): {db_us:,.0f} мкс/запрос\n'
+            f'  индекс, префикс: {prefix_us:,.1f} мкс/запрос\n'
+            f'  индекс, префикс + вхождение: {contains_us:,.1f} мкс/запрос'
+        )
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        with open(options['path'], encoding='utf-8') as file:
+            catalog = [tuple(row) for row in csv.reader(file)]
+        self.run('Каталог из CSV', catalog, rnd, options['queries'])
+        if options['synthetic']:
+            self.run(
+                'Синтетический каталог',
+                self.synthetic_catalog(options['synthetic'], rnd),
+                rnd,
+                options['queries']
+            )
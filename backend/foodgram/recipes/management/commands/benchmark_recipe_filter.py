@@ -0,0 +1,104 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from recipes.filters import RecipeFilter
+from recipes.models import Recipe, Tag
+from recipes.query_plans import active_user_id
+from recipes.seed import Seeder
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Лента рецептов с фильтром по нескольким тегам и избранному: '
+            'JOIN с DISTINCT против EXISTS')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tags', type=int, default=3,
+                            help='сколько самых популярных тегов выбрать')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=6)
+        parser.add_argument('--seed', type=float, metavar='SCALE',
+                            help='на время замера добавить синтетические '
+                                 'данные, SCALE=1 — 10 000 рецептов')
+
+    @staticmethod
+    def joined(queryset, slugs, user):
+        """ Прежний RecipeFilter: JOIN по тегам и избранному. """
+
+        return queryset.filter(tags__slug__in=slugs).filter(
+            favorites__consumer=user
+        ).distinct()
+
+    @staticmethod
+    def semi_joined(queryset, slugs, user):
+        request = APIRequestFactory().get('/', {'tags': slugs,
+                                                'is_favorited': 1})
+        request.user = user
+        filterset = RecipeFilter(Request(request).query_params, queryset,
+                                 request=request)
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors)
+        return filterset.qs
+
+    def measure(self, build, slugs, user, repeat, page_size):
+        """ Страница ленты: COUNT(*) и первые page_size рецептов. """
+
+        queryset = build(Recipe.objects.order_by('-pub_date', '-id'),
+                         slugs, user)
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                count = queryset.count()
+                ids = list(queryset.values_list('id', flat=True)[:page_size])
+                timings.append(time.perf_counter() - start)
+        timings.sort()
+        return count, ids, len(queries), timings[len(timings) // 2]
+
+    def run(self, options):
+        user = User.objects.filter(pk=active_user_id()).first()
+        if user is None:
+            raise CommandError('Нет пользователей с избранным, '
+                               'запустите с --seed.')
+        slugs = list(Tag.objects.annotate(
+            recipes_count=Count('recipes')
+        ).order_by('-recipes_count').values_list('slug', flat=True)[
+            :options['tags']
+        ])
+        # Карта тегов попадает в кэш до замеров, как у работающего сервера.
+        self.semi_joined(Recipe.objects.all(), slugs, user)
+        self.stdout.write(f'теги: {", ".join(slugs)}; '
+                          f'пользователь: {user.username}')
+        results = {}
+        for name, build in (('JOIN + DISTINCT', self.joined),
+                            ('EXISTS', self.semi_joined)):
+            count, ids, queries, median = self.measure(
+                build, slugs, user, options['repeat'], options['page_size']
+            )
+            results[name] = (count, ids)
+            self.stdout.write(f'{name:<16} рецептов {count:>7} '
+                              f'запросов {queries:>3} '
+                              f'медиана {median * 1000:>9.2f} мс')
+        if len(set(map(repr, results.values()))) > 1:
+            raise CommandError('Варианты фильтра вернули разные рецепты.')
+        anonymous = self.semi_joined(Recipe.objects.all(), slugs,
+                                     AnonymousUser())
+        with CaptureQueriesContext(connection) as queries:
+            anonymous.count()
+        self.stdout.write(f'{"аноним":<16} рецептов {anonymous.count():>7} '
+                          f'запросов {len(queries):>3}')
+
+    def handle(self, *args, **options):
+        if options['seed'] is None:
+            return self.run(options)
+        with transaction.atomic():
+            Seeder().run_scaled(options['seed'])
+            self.run(options)
+            transaction.set_rollback(True)
@@ -0,0 +1,102 @@
+import base64
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from PIL import Image
+from rest_framework.test import APIRequestFactory
+
+from recipes.models import Ingredient, Tag
+from recipes.serializers import RecipePostSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Число запросов к БД при создании и изменении рецепта '
+            'в зависимости от числа ингредиентов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int,
+                            default=(1, 10, 30, 100))
+        parser.add_argument('--tags', type=int, default=3)
+
+    @staticmethod
+    def make_image():
+        buffer = io.BytesIO()
+        Image.new('RGB', (8, 8)).save(buffer, 'PNG')
+        return ('data:image/png;base64,'
+                + base64.b64encode(buffer.getvalue()).decode())
+
+    @staticmethod
+    def count_queries(serializer):
+        with CaptureQueriesContext(connection) as validate:
+            serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as save:
+            recipe = serializer.save()
+        return recipe, len(validate), len(save)
+
+    def run(self, size, tags_count, image):
+        request = APIRequestFactory().post('/')
+        request.user = User.objects.create(username=f'benchmark-{size}',
+                                           email=f'benchmark-{size}@x.ru')
+        context = {'request': request}
+        # bulk_create возвращает id не на всех СУБД — перечитываем.
+        Tag.objects.bulk_create(
+            Tag(name=f'benchmark {size} {i}',
+                color=f'#{size:03X}{i:03X}',
+                slug=f'benchmark-{size}-{i}')
+            for i in range(tags_count)
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'benchmark {size} {i}', measurement_unit='г')
+            for i in range(size * 2)
+        )
+        tags = Tag.objects.filter(slug__startswith=f'benchmark-{size}-')
+        ingredients = list(Ingredient.objects.filter(
+            name__startswith=f'benchmark {size} '
+        ).order_by('id'))
+        data = {
+            'name': 'benchmark',
+            'text': 'benchmark',
+            'cooking_time': 10,
+            'image': image,
+            'tags': [tag.id for tag in tags],
+            'ingredients': [{'id': ingredient.id, 'amount': 1}
+                            for ingredient in ingredients[:size]]
+        }
+        recipe, create_validate, create_save = self.count_queries(
+            RecipePostSerializer(data=data, context=context)
+        )
+        # Половина ингредиентов остаётся, у части меняется количество,
+        # остальные заменяются новыми.
+        kept = ingredients[:size][::2]
+        data.pop('image')
+        data['tags'] = data['tags'][1:]
+        data['ingredients'] = (
+            [{'id': ingredient.id, 'amount': 2} for ingredient in kept]
+            + [{'id': ingredient.id, 'amount': 1}
+               for ingredient in ingredients[size:2 * size - len(kept)]]
+        )
+        _, update_validate, update_save = self.count_queries(
+            RecipePostSerializer(recipe, data=data, partial=True,
+                                 context=context)
+        )
+        recipe.image.delete(save=False)
+        return create_validate, create_save, update_validate, update_save
+
+    def handle(self, *args, **options):
+        image = self.make_image()
+        self.stdout.write(f'{"ингредиентов":>12} {"создание":>18} '
+                          f'{"изменение":>18}')
+        self.stdout.write(f'{"":>12} {"проверка":>9}{"запись":>9} '
+                          f'{"проверка":>9}{"запись":>9}')
+        for size in options['sizes']:
+            with override_settings(JOBS_EAGER=False), transaction.atomic():
+                counts = self.run(size, options['tags'], image)
+                transaction.set_rollback(True)
+            self.stdout.write(f'{size:>12} ' + ''.join(
+                f'{count:>9}' for count in counts[:2]
+            ) + ' ' + ''.join(f'{count:>9}' for count in counts[2:]))
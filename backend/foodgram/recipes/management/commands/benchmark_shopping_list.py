@@ -0,0 +1,50 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from recipes.pdf import build_pdf, get_styles, render_shopping_list
+
+
+class Command(BaseCommand):
+    help = 'Время и память рендера списка покупок в PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int,
+                            default=(10, 100, 1000))
+        parser.add_argument('--repeat', type=int, default=5)
+
+    @staticmethod
+    def make_rows(size):
+        return [(f'ингредиент {i}', 'г', i + 1) for i in range(size)]
+
+    def measure(self, func, rows, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(rows)
+            timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        func(rows)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return min(timings) * 1000, peak / 1024
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        get_styles()
+        self.stdout.write(
+            f'Загрузка шрифта: {(time.perf_counter() - start) * 1000:.1f} мс'
+        )
+        self.stdout.write(f'{"строк":>6} {"страниц":>8} {"рендер, мс":>11} '
+                          f'{"пик, КиБ":>9} {"из кэша, мс":>12}')
+        for size in options['sizes']:
+            rows = self.make_rows(size)
+            render_ms, peak_kib = self.measure(build_pdf, rows,
+                                               options['repeat'])
+            pages = build_pdf(rows).count(b'/Type /Page\n')
+            render_shopping_list(rows)
+            cached_ms, _ = self.measure(render_shopping_list, rows,
+                                        options['repeat'])
+            self.stdout.write(f'{size:>6} {pages:>8} {render_ms:>11.1f} '
+                              f'{peak_kib:>9.0f} {cached_ms:>12.3f}')
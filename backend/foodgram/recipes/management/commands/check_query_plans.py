@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+
+from recipes.query_plans import (active_user_id, explain, hot_requests,
+                                 large_tables)
+from recipes.seed import Seeder
+
+
+class Command(BaseCommand):
+    help = ('EXPLAIN запросов горячих эндпоинтов: ошибка при полном '
+            'чтении большой таблицы или росте стоимости плана')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=float, metavar='SCALE',
+                            help='сначала добавить синтетические данные, '
+                                 'SCALE=1 — 10 000 рецептов')
+        parser.add_argument('--min-rows', type=int, default=10_000,
+                            help='с какого числа строк таблица большая')
+        parser.add_argument('--baseline',
+                            default=settings.BASE_DIR / 'query_plans.json')
+        parser.add_argument('--record', action='store_true',
+                            help='записать стоимости как новый эталон')
+        parser.add_argument('--tolerance', type=float, default=1.5,
+                            help='допустимый рост стоимости плана')
+
+    def capture(self, client, path, params, headers):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(path, params, **headers)
+        if response.status_code != 200:
+            raise CommandError(f'{path}: ответ {response.status_code}')
+        return [query['sql'] for query in context.captured_queries
+                if query['sql'].lstrip().upper().startswith('SELECT')]
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            Seeder().run_scaled(options['seed'])
+        user_id = active_user_id()
+        if user_id is None:
+            raise CommandError('Нет данных: запустите с --seed')
+        token, _ = Token.objects.get_or_create(user_id=user_id)
+        auth = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+        large = large_tables(connection, options['min_rows'])
+        baseline_path = Path(options['baseline'])
+        baseline = (json.loads(baseline_path.read_text())
+                    if baseline_path.exists() else {})
+        costs = {}
+        failures = []
+        client = Client()
+        with override_settings(ALLOWED_HOSTS=['testserver'],
+                               RECIPE_CACHE_TIMEOUT=0):
+            for name, path, params, authenticated in hot_requests(connection):
+                queries = self.capture(client, path, params,
+                                       auth if authenticated else {})
+                cost = 0
+                for sql in queries:
+                    scanned, query_cost = explain(connection, sql)
+                    cost += query_cost or 0
+                    for table in sorted(scanned & large):
+                        failures.append(
+                            f'{name}: полное чтение {table}\n    {sql}'
+                        )
+                costs[name] = round(cost, 2)
+                limit = baseline.get(name, 0) * options['tolerance']
+                if baseline.get(name) and cost > limit:
+                    failures.append(f'{name}: стоимость {cost:.0f} > '
+                                    f'{limit:.0f} (эталон {baseline[name]})')
+                self.stdout.write(f'{name:<60} {len(queries):>3} запр. '
+                                  f'стоимость {cost:>12.1f}')
+        if options['record']:
+            baseline_path.write_text(json.dumps(costs, indent=2,
+                                                ensure_ascii=False) + '\n')
+            self.stdout.write(f'Эталон записан в {baseline_path}')
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Планы запросов в порядке'))
@@ -0,0 +1,97 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from recipes.query_plans import active_user_id, hot_requests
+from recipes.seed import Seeder
+
+
+# Способы собрать ленту: первый — эталон.
+RENDERERS = (
+    ('сериализатор', {'RECIPE_LIST_FAST_PATH': False,
+                      'RECIPE_FRAGMENT_TIMEOUT': 0}),
+    ('values()', {'RECIPE_LIST_FAST_PATH': True,
+                  'RECIPE_FRAGMENT_TIMEOUT': 0}),
+    ('фрагменты', {'RECIPE_LIST_FAST_PATH': False,
+                   'RECIPE_FRAGMENT_TIMEOUT': 60}),
+)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает ленту рецептов из RecipeGetSerializer с '
+            'recipes.listing и recipes.fragments: ответы должны совпадать '
+            'побайтно')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=float, metavar='SCALE',
+                            help='сначала добавить синтетические данные, '
+                                 'SCALE=1 — 10 000 рецептов')
+        parser.add_argument('--limits', nargs='+', type=int,
+                            default=(6, 50, 200))
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='сколько раз замерить каждый вариант')
+
+    def get_requests(self):
+        """ Запросы ленты из check_query_plans и страницы разной длины. """
+
+        requests = [(name, params, authenticated)
+                    for name, path, params, authenticated
+                    in hot_requests(connection)
+                    if path == '/api/recipes/']
+        for limit in self.options['limits']:
+            requests.extend((
+                (f'recipes?limit={limit} (аноним)', {'limit': limit}, False),
+                (f'recipes?limit={limit}', {'limit': limit}, True),
+                (f'recipes?pagination=cursor&limit={limit}',
+                 {'pagination': 'cursor', 'limit': limit}, True),
+            ))
+        return requests
+
+    def fetch(self, client, params, headers, renderer_settings):
+        timings = []
+        with override_settings(**renderer_settings):
+            for _ in range(self.options['repeat']):
+                start = time.perf_counter()
+                response = client.get('/api/recipes/', params, **headers)
+                timings.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise CommandError(f'{params}: ответ {response.status_code}')
+        timings.sort()
+        return response.content, timings[len(timings) // 2]
+
+    def handle(self, *args, **options):
+        self.options = options
+        if options['seed']:
+            Seeder().run_scaled(options['seed'])
+        user_id = active_user_id()
+        if user_id is None:
+            raise CommandError('Нет данных: запустите с --seed')
+        token, _ = Token.objects.get_or_create(user_id=user_id)
+        auth = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+        client = Client()
+        failures = []
+        self.stdout.write(f'{"":<60}' + ''.join(
+            f'{name:>14}' for name, _ in RENDERERS
+        ))
+        with override_settings(ALLOWED_HOSTS=['testserver'],
+                               RECIPE_CACHE_TIMEOUT=0):
+            for name, params, authenticated in self.get_requests():
+                headers = auth if authenticated else {}
+                bodies, timings = zip(*(
+                    self.fetch(client, params, headers, renderer_settings)
+                    for _, renderer_settings in RENDERERS
+                ))
+                for (renderer, _), body in zip(RENDERERS[1:], bodies[1:]):
+                    if body != bodies[0]:
+                        failures.append(f'{name}: {renderer} — ответ '
+                                        f'отличается от сериализатора')
+                self.stdout.write(f'{name:<60}' + ''.join(
+                    f'{timing * 1000:>11.1f} мс' for timing in timings
+                ))
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Ответы совпадают побайтно'))
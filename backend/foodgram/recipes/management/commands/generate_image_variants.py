@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание уменьшенных копий картинок для существующих рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='пересоздать и уже готовые копии')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.only('image', 'image_variants')
+        if not options['force']:
+            recipes = recipes.filter(image_variants={})
+        done = failed = 0
+        for recipe in recipes.iterator():
+            try:
+                recipe.refresh_image_variants()
+                done += 1
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe.pk}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {done}, с ошибками: {failed}'
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.loaders import LOADERS, LoaderError, load
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ROWS = 20
+
+
+class Command(BaseCommand):
+    help = 'Загрузка ингредиентов или тэгов из CSV или JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=tuple(LOADERS))
+        parser.add_argument(
+            '--path',
+            help='CSV или JSON-массив; по умолчанию recipes/data/<kind>.csv'
+        )
+        parser.add_argument('--chunk-size', type=int,
+                            default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = (options['path']
+                or settings.BASE_DIR / f'recipes/data/{options["kind"]}.csv')
+        start = time.perf_counter()
+        try:
+            read, inserted, rejected = load(options['kind'], path,
+                                            options['chunk_size'])
+        except (LoaderError, OSError) as error:
+            raise CommandError(f'Ошибка при загрузке данных: {error}')
+        elapsed = time.perf_counter() - start
+        for where, messages in rejected[:MAX_REPORTED_ROWS]:
+            self.stderr.write(f'{where}: {"; ".join(messages)}')
+        if len(rejected) > MAX_REPORTED_ROWS:
+            self.stderr.write(f'... и ещё '
+                              f'{len(rejected) - MAX_REPORTED_ROWS}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загрузка данных завершена: прочитано {read}, '
+            f'добавлено {inserted}, отклонено {len(rejected)}, '
+            f'пропущено {read - inserted - len(rejected)} '
+            f'за {elapsed:.2f} с ({read / max(elapsed, 1e-9):,.0f} строк/с)'
+        ))
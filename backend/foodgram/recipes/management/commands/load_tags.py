@@ -1,23 +1,10 @@
-import csv
-import sys
-
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 
-from recipes.models import Tag
-
 
 class Command(BaseCommand):
+    help = 'Загрузка тэгов из recipes/data/tags.csv'
+
     def handle(self, *args, **options):
-        try:
-            with open('recipes/data/tags.csv',
-                      encoding='utf-8') as file:
-                reader = csv.reader(file)
-                for name, color, slug in reader:
-                    Tag.objects.get_or_create(
-                        name=name,
-                        color=color,
-                        slug=slug
-                    )
-            sys.stdout.write('Загрузка данных завершена')
-        except Exception as e:
-            sys.stdout.write(f'Ошибка при загрузке данных: {e}')
+        call_command('load_reference_data', 'tags',
+                     stdout=self.stdout, stderr=self.stderr)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from recipes.shopping_list import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Пересборка списков покупок из корзин пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', nargs='+', type=int, metavar='ID',
+                            help='только для этих пользователей')
+
+    def handle(self, *args, **options):
+        rows = rebuild_shopping_lists(options['users'])
+        self.stdout.write(f'Строк в списках покупок: {rows}')
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.seed import Seeder
+
+COUNTS = {
+    'users': 10_000,
+    'recipes': 100_000,
+    'tags': 30,
+    'ingredients': 5_000,
+    'favorites': 1_000_000,
+    'cart_items': 100_000,
+    'subscriptions': 200_000,
+}
+
+
+class Command(BaseCommand):
+    help = ('Синтетические пользователи, рецепты, избранное, корзины '
+            'и подписки для нагрузочного тестирования')
+
+    def add_arguments(self, parser):
+        for name, default in COUNTS.items():
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int,
+                                default=default)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8,
+                            help='в среднем')
+        parser.add_argument('--images', type=int, default=8,
+                            help='число картинок-заглушек')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=10_000)
+        parser.add_argument('--clear', action='store_true',
+                            help='сначала удалить данные прошлого запуска')
+
+    def handle(self, *args, **options):
+        if min(options[name] for name in COUNTS) < 1:
+            raise CommandError('Все количества должны быть больше нуля')
+        start = time.perf_counter()
+        seeder = Seeder(options['seed'], options['chunk_size'],
+                        log=self.stdout.write)
+        if options['clear']:
+            seeder.clear()
+        seeder.run(
+            tags_per_recipe=options['tags_per_recipe'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+            images=options['images'],
+            **{name: options[name] for name in COUNTS}
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - start:.0f} с'
+        ))
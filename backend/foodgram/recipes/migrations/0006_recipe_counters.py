@@ -0,0 +1,51 @@
+# Generated by Django 3.2 on 2026-10-18 10:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('recipes', 'Recipe', 'favorites_count', 'Favorites', 'recipe'),
+    ('recipes', 'Recipe', 'cart_count', 'ShoppingCart', 'recipe'),
+    ('users', 'User', 'recipes_count', 'Recipe', 'author'),
+    ('users', 'User', 'followers_count', 'Subscription', 'author'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for app_label, model_name, field, source_name, foreign_key in COUNTERS:
+        source = apps.get_model('recipes', source_name)
+        apps.get_model(app_label, model_name).objects.update(**{
+            field: Coalesce(
+                Subquery(
+                    source.objects.filter(
+                        **{foreign_key: OuterRef('pk')}
+                    ).order_by().values(foreign_key).annotate(
+                        total=Count('pk')
+                    ).values('total')
+                ),
+                Value(0)
+            )
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_image_variants'),
+        ('users', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='cart_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='добавлений в корзину'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='добавлений в избранное'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
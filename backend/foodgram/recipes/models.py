@@ -1,7 +1,10 @@
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch, Subquery, Value
 
+from .images import build_variants
 from .validators import validate_color
+from .versions import bump_after_commit
 from foodgram.constants import (
     MAX_NAME_FIELD,
     TRUNCATED_MODEL_NAME,
@@ -13,7 +16,11 @@ from foodgram.constants import (
     MAX_AMOUNT_FOR_INGREDIENT,
     AMOUNT_ERROR_TEXT,
     COLOR_SYMBOLS_COUNT,
+    IMAGE_VARIANTS_JOB,
+    RECIPE_VERSION,
+    RECIPES_VERSION,
 )
+from jobs.registry import enqueue
 from users.models import User
 
 
@@ -98,6 +105,56 @@ class Ingredient(NameModel):
         return self.name[:TRUNCATED_MODEL_NAME]
 
 
+class RecipeQuerySet(models.QuerySet):
+    """ Выборки рецептов для отображения. """
+
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch(
+                'recipeingredient',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ).order_by('id')
+            )
+        )
+
+    def with_user_flags(self, user):
+        """ Флаги избранного и корзины одним запросом через EXISTS. """
+
+        if not user.is_authenticated:
+            return self.annotate(is_favorited=Value(False),
+                                 is_in_shopping_cart=Value(False))
+        return self.annotate(
+            is_favorited=Exists(Favorites.objects.filter(
+                consumer=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                consumer=user, recipe=OuterRef('pk')
+            ))
+        )
+
+    def first_per_author(self, author_ids, limit=None):
+        """ Первые limit рецептов каждого автора одним запросом.
+
+        Рецепты автора отбираются коррелированным подзапросом
+        с LIMIT по индексу recipe_author_feed_idx, результат
+        сгруппирован по id автора.
+        """
+
+        recipes = self.filter(author__in=author_ids)
+        if limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(
+                self.model.objects.filter(
+                    author=OuterRef('author')
+                ).order_by('-pub_date', '-id').values('pk')[:limit]
+            ))
+        by_author = {}
+        for recipe in recipes.order_by('-pub_date', '-id'):
+            by_author.setdefault(recipe.author_id, []).append(recipe)
+        return by_author
+
+
 class Recipe(NameModel):
     """ Рецепт. """
 
@@ -114,6 +171,12 @@ class Recipe(NameModel):
         'картинка',
         upload_to='recipes/'
     )
+    image_variants = models.JSONField(
+        'уменьшенные копии картинки',
+        default=dict,
+        blank=True,
+        editable=False
+    )
     text = models.TextField('текст рецепта')
     cooking_time = models.PositiveSmallIntegerField(
         'время приготовления',
@@ -130,13 +193,46 @@ class Recipe(NameModel):
     )
     pub_date = models.DateTimeField('Дата публикации',
                                     auto_now_add=True)
+    favorites_count = models.PositiveIntegerField('добавлений в избранное',
+                                                  default=0,
+                                                  db_index=True,
+                                                  editable=False)
+    cart_count = models.PositiveIntegerField('добавлений в корзину',
+                                             default=0,
+                                             db_index=True,
+                                             editable=False)
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         default_related_name = 'recipes'
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'),
+                         name='recipe_feed_idx'),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='recipe_author_feed_idx'),
+        )
         verbose_name = 'рецепт'
         verbose_name_plural = 'Рецепты'
 
+    def save(self, *args, **kwargs):
+        image_uploaded = bool(self.image) and not self.image._committed
+        super().save(*args, **kwargs)
+        if image_uploaded:
+            enqueue(IMAGE_VARIANTS_JOB, recipe_id=self.pk)
+
+    def refresh_image_variants(self):
+        """ Пересоздаёт уменьшенные копии картинки. """
+
+        self.image_variants = build_variants(self.image, self.pk,
+                                             self.image_variants)
+        Recipe.objects.filter(pk=self.pk).update(
+            image_variants=self.image_variants
+        )
+        bump_after_commit(RECIPES_VERSION)
+        bump_after_commit(RECIPE_VERSION.format(self.pk))
+
 
 class Subscription(models.Model):
     """ Подписка. """
@@ -221,3 +317,33 @@ class RecipeIngredient(models.Model):
     def __str__(self):
         return (f'{self.recipe.name[:TRUNCATED_MODEL_NAME]} '
                 f'{self.ingredient.name[:TRUNCATED_MODEL_NAME]}')
+
+
+class ShoppingListItem(models.Model):
+    """ Сумма ингредиента по всем рецептам в корзине пользователя.
+
+    Поддерживается recipes.shopping_list при изменении корзины
+    и ингредиентов рецептов из неё.
+    """
+
+    user = models.ForeignKey(User,
+                             verbose_name='пользователь',
+                             on_delete=models.CASCADE)
+    ingredient = models.ForeignKey(Ingredient,
+                                   verbose_name='ингредиент',
+                                   on_delete=models.CASCADE)
+    total_amount = models.PositiveIntegerField('количество')
+
+    class Meta:
+        default_related_name = 'shopping_list'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item'
+            ),
+        )
+        verbose_name = 'строка списка покупок'
+        verbose_name_plural = 'списки покупок'
+
+    def __str__(self):
+        return f'{self.user} — {self.ingredient}: {self.total_amount}'
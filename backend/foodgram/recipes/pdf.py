@@ -0,0 +1,82 @@
+import hashlib
+import io
+import json
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from foodgram.constants import (SHOPPING_LIST_CACHE_PREFIX,
+                                SHOPPING_LIST_CACHE_TIMEOUT,
+                                SHOPPING_LIST_FONT,
+                                SHOPPING_LIST_ITEM,
+                                SHOPPING_LIST_TITLE)
+
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """ Шрифт регистрируется и стили создаются один раз на процесс. """
+
+    pdfmetrics.registerFont(TTFont(
+        SHOPPING_LIST_FONT,
+        settings.BASE_DIR / f'{SHOPPING_LIST_FONT}.ttf'
+    ))
+    title_style = ParagraphStyle('shopping_list_title',
+                                 fontName=SHOPPING_LIST_FONT,
+                                 fontSize=16,
+                                 leading=20,
+                                 spaceAfter=8 * mm)
+    item_style = ParagraphStyle('shopping_list_item',
+                                fontName=SHOPPING_LIST_FONT,
+                                fontSize=14,
+                                leading=18)
+    return title_style, item_style
+
+
+def build_pdf(rows):
+    """ PDF из строк (название, единица, количество), в несколько страниц. """
+
+    title_style, item_style = get_styles()
+    story = [Paragraph(SHOPPING_LIST_TITLE, title_style)]
+    story.extend(
+        Paragraph(
+            escape(SHOPPING_LIST_ITEM.format(name.capitalize(),
+                                             unit,
+                                             amount)),
+            item_style
+        ) for name, unit, amount in rows
+    )
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer,
+                      pagesize=A4,
+                      leftMargin=25 * mm,
+                      rightMargin=25 * mm,
+                      topMargin=25 * mm,
+                      bottomMargin=25 * mm).build(story)
+    return buffer.getvalue()
+
+
+def get_cache_key(rows):
+    digest = hashlib.sha256(
+        json.dumps(rows, ensure_ascii=False).encode()
+    ).hexdigest()
+    return f'{SHOPPING_LIST_CACHE_PREFIX}:{digest}'
+
+
+def render_shopping_list(rows):
+    """ Список покупок в PDF; одинаковые списки берутся из кэша. """
+
+    rows = [list(row) for row in rows]
+    key = get_cache_key(rows)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = build_pdf(rows)
+        cache.set(key, pdf, SHOPPING_LIST_CACHE_TIMEOUT)
+    return pdf
@@ -0,0 +1,105 @@
+import json
+import re
+from itertools import combinations
+
+from django.db.models import Count
+
+from .models import Favorites, Recipe, Tag
+
+RECIPE_FILTERS = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart',
+                  'search')
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def hot_requests(connection):
+    """ Запросы горячих эндпоинтов: (название, путь, параметры, с токеном).
+
+    Лента рецептов проверяется со всеми сочетаниями фильтров RecipeFilter.
+    Поиск без PostgreSQL сводится к icontains и читает таблицу целиком,
+    поэтому проверяется только там.
+    """
+
+    recipe = Recipe.objects.only('id', 'name', 'author').order_by('-id')[0]
+    tags = Tag.objects.annotate(
+        recipes_count=Count('recipes')
+    ).order_by('-recipes_count').values_list('slug', flat=True)[:2]
+    values = {
+        'tags': list(tags),
+        'author': recipe.author_id,
+        'is_favorited': 1,
+        'is_in_shopping_cart': 1,
+        'search': recipe.name.split()[0],
+    }
+    recipe_filters = [
+        name for name in RECIPE_FILTERS
+        if name != 'search' or connection.vendor == 'postgresql'
+    ]
+    requests = [('recipes (аноним)', '/api/recipes/', {}, False)]
+    for size in range(len(recipe_filters) + 1):
+        for names in combinations(recipe_filters, size):
+            requests.append((
+                '?'.join(('recipes', '&'.join(names))).rstrip('?'),
+                '/api/recipes/',
+                {name: values[name] for name in names},
+                True
+            ))
+    requests.extend((
+        ('recipe', f'/api/recipes/{recipe.id}/', {}, True),
+        ('subscriptions', '/api/users/subscriptions/',
+         {'recipes_limit': 3}, True),
+        ('download_shopping_cart', '/api/recipes/download_shopping_cart/',
+         {}, True),
+        ('ingredients', '/api/ingredients/', {'name': 'сол'}, False),
+    ))
+    return requests
+
+
+def active_user_id():
+    return Favorites.objects.order_by('-id').values_list(
+        'consumer', flat=True
+    ).first()
+
+
+def large_tables(connection, min_rows):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('ANALYZE')
+            cursor.execute(
+                "SELECT relname FROM pg_class "
+                "WHERE relkind = 'r' AND reltuples >= %s",
+                (min_rows,)
+            )
+            return {name for name, in cursor.fetchall()}
+        tables = set()
+        for table in connection.introspection.table_names(cursor):
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+            )
+            if cursor.fetchone()[0] >= min_rows:
+                tables.add(table)
+        return tables
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+def explain(connection, sql):
+    """ План запроса: (таблицы, читаемые целиком, стоимость или None). """
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            plan = plan[0]['Plan']
+            return ({node['Relation Name'] for node in plan_nodes(plan)
+                     if node['Node Type'] == 'Seq Scan'},
+                    plan['Total Cost'])
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return ({match.group(1) for *_, detail in cursor.fetchall()
+                 if (match := SQLITE_SCAN.match(detail))},
+                None)
@@ -0,0 +1,139 @@
+import json
+import threading
+from bisect import bisect_left, bisect_right
+
+from django.db import connections
+from django.db.models import (BooleanField, Case, FloatField, IntegerField,
+                              Q, Value, When)
+from django.db.models.expressions import RawSQL
+
+from .models import Ingredient
+from .versions import get_version
+from foodgram.constants import INGREDIENTS_VERSION
+
+
+class IngredientIndex:
+    """ Отсортированный по имени индекс ингредиентов в памяти процесса.
+
+    Строки ответа закодированы в JSON заранее, поиск по префиксу —
+    двоичный поиск по списку ключей в нижнем регистре.
+    """
+
+    def __init__(self, ingredients):
+        entries = sorted(
+            (name.lower(), pk, json.dumps(
+                {'id': pk, 'name': name, 'measurement_unit': unit},
+                ensure_ascii=False,
+                separators=(',', ':')
+            ).encode())
+            for pk, name, unit in ingredients
+        )
+        self.keys = [key for key, _, _ in entries]
+        self.rows = [row for _, _, row in entries]
+        self.text = '\n'.join(self.keys)
+        self.offsets = []
+        offset = 0
+        for key in self.keys:
+            self.offsets.append(offset)
+            offset += len(key) + 1
+
+    def __len__(self):
+        return len(self.keys)
+
+    def prefix_range(self, query):
+        start = bisect_left(self.keys, query)
+        end = bisect_left(self.keys, query + '\U0010ffff', start)
+        return start, end
+
+    def search(self, query, contains=False):
+        """ Совпадения по началу имени, затем (по желанию) — по вхождению. """
+
+        query = query.lower()
+        if not query:
+            return self.rows
+        start, end = self.prefix_range(query)
+        rows = self.rows[start:end]
+        if contains and '\n' not in query:
+            rows.extend(self.rows[position]
+                        for position in self.contains_positions(query)
+                        if not start <= position < end)
+        return rows
+
+    def contains_positions(self, query):
+        """ Позиции ключей с вхождением query: поиск по склеенной строке. """
+
+        found = self.text.find(query)
+        while found != -1:
+            position = bisect_right(self.offsets, found) - 1
+            yield position
+            if position + 1 == len(self.offsets):
+                return
+            found = self.text.find(query, self.offsets[position + 1])
+
+    def render(self, query, contains=False):
+        return b'[' + b','.join(self.search(query, contains)) + b']'
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_ingredient_index():
+    """ Индекс строится лениво и пересобирается при смене версии.
+
+    Версия живёт в общем кэше (recipes.W001 требует общий кэш в
+    продакшене): её меняют сигналы Ingredient и load_reference_data.
+    """
+
+    global _index, _index_version
+    version = get_version(INGREDIENTS_VERSION)
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                _index = IngredientIndex(Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                ).iterator())
+                _index_version = version
+    return _index
+
+
+# Столбец search_vector и GIN-индексы создаются миграцией 0007 только
+# в PostgreSQL, поэтому модель о них не знает.
+RECIPE_SEARCH_MATCH = (
+    '"recipes_recipe"."search_vector" '
+    "@@ websearch_to_tsquery('russian', %s) "
+    'OR "recipes_recipe"."name" %% %s'
+)
+RECIPE_SEARCH_RANK = (
+    'ts_rank("recipes_recipe"."search_vector", '
+    "websearch_to_tsquery('russian', %s)) "
+    '+ similarity("recipes_recipe"."name", %s)'
+)
+
+
+def search_recipes(queryset, query):
+    """ Рецепты, подходящие под запрос, по убыванию релевантности.
+
+    В PostgreSQL — полнотекстовый поиск по названию и тексту плюс
+    триграммы для опечаток в названии, оба условия идут по GIN-индексам.
+    В остальных СУБД — icontains, совпадения в названии выше.
+    """
+
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset = queryset.filter(
+            RawSQL(RECIPE_SEARCH_MATCH, (query, query),
+                   output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(RECIPE_SEARCH_RANK, (query, query),
+                               output_field=FloatField())
+        )
+    else:
+        queryset = queryset.filter(
+            Q(name__icontains=query) | Q(text__icontains=query)
+        ).annotate(
+            search_rank=Case(When(name__icontains=query, then=Value(1)),
+                             default=Value(0),
+                             output_field=IntegerField())
+        )
+    return queryset.order_by('-search_rank', '-pub_date', '-id')
@@ -0,0 +1,364 @@
+import csv
+import io
+import json
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from .counters import reconcile_counters
+from .images import build_variants
+from .loaders import chunked
+from .models import (Favorites, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Subscription, Tag)
+from .shopping_list import rebuild_shopping_lists
+from .versions import bump_version
+from foodgram.constants import (INGREDIENTS_VERSION,
+                                RECIPES_VERSION,
+                                TAGS_VERSION)
+from users.models import User
+
+SEED_PREFIX = 'seed'
+# Домен .invalid зарезервирован (RFC 2606): настоящих адресов в нём нет,
+# по нему и отличаются синтетические пользователи.
+SEED_EMAIL_DOMAIN = 'seed.invalid'
+SEED_TAG_SLUG = rf'^{SEED_PREFIX}-\d+$'
+SEED_INGREDIENT_NAME = rf'^{SEED_PREFIX} ингредиент \d+$'
+# Даты публикации отсчитываются от постоянной точки, а не от текущего
+# времени: одинаковый seed даёт одинаковые данные.
+SEED_NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+SEED_IMAGES_DIR = 'seed'
+SEED_IMAGE_SIZE = (600, 400)
+SEED_DAYS = 3 * 365
+# Показатели степени закона Ципфа: чем больше, тем сильнее перекос.
+RECIPE_POPULARITY = 1.0
+AUTHOR_POPULARITY = 1.2
+USER_ACTIVITY = 0.8
+INGREDIENT_POPULARITY = 0.9
+# Объём данных при scale=1 для проверок, которые сами заполняют базу.
+SEED_SCALE = {
+    'users': 1_000,
+    'recipes': 10_000,
+    'tags': 20,
+    'ingredients': 2_000,
+    'favorites': 100_000,
+    'cart_items': 20_000,
+    'subscriptions': 20_000,
+}
+WORDS = ('суп', 'борщ', 'салат', 'пирог', 'каша', 'омлет', 'плов',
+         'запеканка', 'котлеты', 'блины', 'рагу', 'паста', 'соус',
+         'куриный', 'овощной', 'грибной', 'сырный', 'быстрый', 'летний',
+         'домашний', 'острый', 'сладкий', 'постный', 'праздничный')
+
+
+def zipf_weights(count, exponent):
+    """ Накопленные веса рангов 1..count по закону Ципфа. """
+
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, count + 1)))
+
+
+def seed_users():
+    return User.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}')
+
+
+class Seeder:
+    """ Синтетические данные для нагрузочных тестов и проверки планов.
+
+    Популярность рецептов, активность пользователей и число подписчиков
+    распределены по закону Ципфа. Большие таблицы пишутся через COPY
+    в PostgreSQL и пачками INSERT в остальных СУБД. Одинаковый seed
+    даёт одинаковый набор данных.
+    """
+
+    def __init__(self, seed=0, chunk_size=10_000, log=None):
+        self.rnd = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.now = SEED_NOW
+
+    def insert(self, model, objects):
+        for chunk in chunked(objects, self.chunk_size):
+            model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+
+    def insert_rows(self, model, columns, rows):
+        """ Строки-кортежи в таблицу модели; возвращает их число. """
+
+        table = connection.ops.quote_name(model._meta.db_table)
+        names = ', '.join(connection.ops.quote_name(column)
+                          for column in columns)
+        inserted = 0
+        for chunk in chunked(rows, self.chunk_size):
+            with connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(chunk)
+                    buffer.seek(0)
+                    cursor.copy_expert(
+                        f'COPY {table} ({names}) FROM STDIN '
+                        'WITH (FORMAT csv)',
+                        buffer
+                    )
+                else:
+                    cursor.executemany(
+                        f'INSERT INTO {table} ({names}) '
+                        f'VALUES ({", ".join(["%s"] * len(columns))})',
+                        chunk
+                    )
+            inserted += len(chunk)
+        return inserted
+
+    @staticmethod
+    def ids(queryset):
+        # bulk_create и COPY возвращают id не на всех СУБД — перечитываем.
+        return list(queryset.order_by('id').values_list('id', flat=True))
+
+    def ranked(self, ids):
+        """ Ранги популярности не совпадают с порядком добавления. """
+
+        ids = list(ids)
+        self.rnd.shuffle(ids)
+        return ids
+
+    def distinct_choices(self, population, cum_weights, count, exclude=None):
+        """ count разных элементов с весами; при большом count — без весов. """
+
+        limit = len(population) - (exclude is not None)
+        count = min(count, limit)
+        if count > limit // 2:
+            chosen = set(self.rnd.sample(population,
+                                         min(count + 1, len(population))))
+            chosen.discard(exclude)
+            return sorted(chosen)[:count]
+        chosen = set()
+        while len(chosen) < count:
+            chosen.update(self.rnd.choices(population,
+                                           cum_weights=cum_weights,
+                                           k=count - len(chosen)))
+            chosen.discard(exclude)
+        return sorted(chosen)
+
+    def pairs(self, total, left_ids, left_exponent, right_ids,
+              right_exponent, distinct_ids=False):
+        """ Уникальные пары (left, right): и число пар на левый элемент,
+        и выбор правого подчиняются закону Ципфа.
+        """
+
+        left = self.ranked(left_ids)
+        right = self.ranked(right_ids)
+        left_weights = zipf_weights(len(left), left_exponent)
+        right_weights = zipf_weights(len(right), right_exponent)
+        per_left = Counter()
+        for chunk in range(0, total, self.chunk_size * 100):
+            per_left.update(self.rnd.choices(
+                range(len(left)),
+                cum_weights=left_weights,
+                k=min(self.chunk_size * 100, total - chunk)
+            ))
+        for index in sorted(per_left):
+            left_id = left[index]
+            for right_id in self.distinct_choices(
+                right, right_weights, per_left[index],
+                exclude=left_id if distinct_ids else None
+            ):
+                yield left_id, right_id
+
+    def seed_images(self, count):
+        """ Картинки-заглушки и их уменьшенные копии: (имя, копии). """
+
+        images = []
+        for number in range(count):
+            image = Image.new('RGB', SEED_IMAGE_SIZE,
+                              tuple(self.rnd.randrange(256)
+                                    for _ in range(3)))
+            ImageDraw.Draw(image).text((20, 20), f'{SEED_PREFIX} {number}')
+            buffer = io.BytesIO()
+            image.save(buffer, 'PNG')
+            field = Recipe().image
+            field.save(f'{SEED_IMAGES_DIR}/{number}.png',
+                       ContentFile(buffer.getvalue()),
+                       save=False)
+            variants = build_variants(field, f'{SEED_IMAGES_DIR}/{number}')
+            images.append((field.name, json.dumps(variants)))
+        return images
+
+    def seed_users(self, count):
+        self.insert(User, (
+            User(username=f'{SEED_PREFIX}{i}',
+                 email=f'{SEED_PREFIX}{i}@{SEED_EMAIL_DOMAIN}',
+                 first_name='Имя',
+                 last_name='Фамилия',
+                 password='!')
+            for i in range(count)
+        ))
+        return self.ids(seed_users())
+
+    def seed_tags(self, count):
+        self.insert(Tag, (
+            Tag(name=f'{SEED_PREFIX} {i}',
+                color=f'#{i:06X}',
+                slug=f'{SEED_PREFIX}-{i}')
+            for i in range(count)
+        ))
+        return self.ids(Tag.objects.filter(slug__regex=SEED_TAG_SLUG))
+
+    def seed_ingredients(self, count):
+        self.insert(Ingredient, (
+            Ingredient(name=f'{SEED_PREFIX} ингредиент {i}',
+                       measurement_unit=self.rnd.choice(('г', 'мл', 'шт.')))
+            for i in range(count)
+        ))
+        return self.ids(Ingredient.objects.filter(
+            name__regex=SEED_INGREDIENT_NAME
+        ))
+
+    def seed_recipes(self, count, user_ids, images):
+        authors = self.ranked(user_ids)
+        weights = zipf_weights(len(authors), AUTHOR_POPULARITY)
+        rows = (
+            (
+                ' '.join(self.rnd.sample(WORDS, 3)).capitalize(),
+                author_id,
+                image,
+                variants,
+                ' '.join(self.rnd.choices(WORDS, k=40)),
+                self.rnd.randint(5, 180),
+                connection.ops.adapt_datetimefield_value(
+                    self.now - timedelta(
+                        seconds=self.rnd.randrange(SEED_DAYS * 24 * 3600)
+                    )
+                ),
+                0,
+                0,
+            )
+            for author_id, (image, variants) in zip(
+                self.rnd.choices(authors, cum_weights=weights, k=count),
+                (images[i % len(images)] for i in range(count))
+            )
+        )
+        self.insert_rows(Recipe, ('name', 'author_id', 'image',
+                                  'image_variants', 'text', 'cooking_time',
+                                  'pub_date', 'favorites_count',
+                                  'cart_count'), rows)
+        return self.ids(Recipe.objects.filter(author__in=seed_users()))
+
+    def seed_recipe_links(self, recipe_ids, tag_ids, ingredient_ids,
+                          tags_per_recipe, ingredients_per_recipe):
+        self.insert_rows(Recipe.tags.through, ('recipe_id', 'tag_id'), (
+            (recipe_id, tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in self.rnd.sample(
+                tag_ids, self.rnd.randint(1, min(tags_per_recipe,
+                                                 len(tag_ids)))
+            )
+        ))
+        weights = zipf_weights(len(ingredient_ids), INGREDIENT_POPULARITY)
+        return self.insert_rows(
+            RecipeIngredient,
+            ('recipe_id', 'ingredient_id', 'amount'),
+            (
+                (recipe_id, ingredient_id, self.rnd.randint(1, 500))
+                for recipe_id in recipe_ids
+                for ingredient_id in self.distinct_choices(
+                    ingredient_ids, weights,
+                    self.rnd.randint(1, ingredients_per_recipe * 2 - 1)
+                )
+            )
+        )
+
+    def seed_pairs(self, user_ids, recipe_ids, favorites, cart_items,
+                   subscriptions):
+        counts = {}
+        for model, total in ((Favorites, favorites),
+                             (ShoppingCart, cart_items)):
+            counts[model] = self.insert_rows(
+                model, ('consumer_id', 'recipe_id'),
+                self.pairs(total, user_ids, USER_ACTIVITY,
+                           recipe_ids, RECIPE_POPULARITY)
+            )
+        # Подписчиков у авторов — с тяжёлым хвостом.
+        counts[Subscription] = self.insert_rows(
+            Subscription, ('subscriber_id', 'author_id'),
+            self.pairs(subscriptions, user_ids, USER_ACTIVITY,
+                       user_ids, AUTHOR_POPULARITY, distinct_ids=True)
+        )
+        return counts
+
+    @staticmethod
+    def delete_rows(queryset):
+        """ DELETE одним запросом, без сбора строк и сигналов. """
+
+        sql, params = queryset.values('pk').query.sql_with_params()
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE id IN ({sql})', params)
+
+    def clear(self):
+        """ Удаляет данные прошлых запусков вместе со связанными строками.
+
+        Синтетические пользователи узнаются по домену SEED_EMAIL_DOMAIN,
+        теги и ингредиенты — по точному виду имени, и удаляются, только
+        если ими не пользуются настоящие рецепты. Большие таблицы
+        чистятся напрямую: удаление через ORM отправило бы сигнал на
+        каждую строку.
+        """
+
+        users = seed_users()
+        with transaction.atomic():
+            for model in (Favorites, ShoppingCart, RecipeIngredient,
+                          Recipe.tags.through):
+                self.delete_rows(model.objects.filter(
+                    recipe__author__in=users
+                ))
+            self.delete_rows(Subscription.objects.filter(
+                subscriber__in=users
+            ))
+            self.delete_rows(Recipe.objects.filter(author__in=users))
+            users.delete()
+            Tag.objects.filter(
+                slug__regex=SEED_TAG_SLUG, recipes__isnull=True
+            ).delete()
+            Ingredient.objects.filter(
+                name__regex=SEED_INGREDIENT_NAME, recipes__isnull=True
+            ).delete()
+            rebuild_shopping_lists()
+
+    def run_scaled(self, scale):
+        self.run(**{name: max(int(count * scale), 1)
+                    for name, count in SEED_SCALE.items()})
+
+    def run(self, users, recipes, tags, ingredients, favorites, cart_items,
+            subscriptions, tags_per_recipe=3, ingredients_per_recipe=8,
+            images=8):
+        placeholders = self.seed_images(max(images, 1))
+        self.log(f'Картинок: {len(placeholders)}')
+        with transaction.atomic():
+            user_ids = self.seed_users(users)
+            tag_ids = self.seed_tags(tags)
+            ingredient_ids = self.seed_ingredients(ingredients)
+            self.log(f'Пользователей: {len(user_ids)}, тегов: '
+                     f'{len(tag_ids)}, ингредиентов: {len(ingredient_ids)}')
+            recipe_ids = self.seed_recipes(recipes, user_ids, placeholders)
+            links = self.seed_recipe_links(recipe_ids, tag_ids,
+                                           ingredient_ids, tags_per_recipe,
+                                           ingredients_per_recipe)
+            self.log(f'Рецептов: {len(recipe_ids)}, '
+                     f'ингредиентов в них: {links}')
+            for model, count in self.seed_pairs(user_ids, recipe_ids,
+                                                favorites, cart_items,
+                                                subscriptions).items():
+                self.log(f'{model._meta.verbose_name_plural}: {count}')
+            # Строки добавлены в обход сигналов — счётчики и списки
+            # покупок пересчитываются.
+            reconcile_counters()
+            rebuild_shopping_lists()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        for version in (INGREDIENTS_VERSION, TAGS_VERSION, RECIPES_VERSION):
+            bump_version(version)
@@ -1,14 +1,17 @@
 import base64
 
 from django.core.files.base import ContentFile
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.relations import (MANY_RELATION_KWARGS,
+                                      PrimaryKeyRelatedField)
 
-from .models import (Favorites,
-                     Tag,
+from .images import variant_urls
+from .models import (Tag,
                      Recipe,
                      Ingredient,
-                     RecipeIngredient,
-                     ShoppingCart)
+                     RecipeIngredient)
+from .shopping_list import change_recipe_amounts, lock_recipes
 from foodgram.constants import (MAX_AMOUNT_FOR_INGREDIENT,
                                 MIN_AMOUNT_FOR_INGREDIENT,
                                 NO_INGREDIENTS_TEXT,
@@ -16,7 +19,9 @@ from foodgram.constants import (MAX_AMOUNT_FOR_INGREDIENT,
                                 TAGS_DUPLICATE,
                                 INGREDIENTS_DUPLICATE,
                                 MAX_COOKING_TIME,
-                                MIN_COOKING_TIME)
+                                MIN_COOKING_TIME,
+                                MAX_BULK_RECIPES,
+                                TOO_MANY_ITEMS)
 from users.serializers import UserSerializer
 
 
@@ -31,6 +36,63 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """ Список первичных ключей, проверяемый одним запросом id__in. """
+
+    default_error_messages = {'max_length': TOO_MANY_ITEMS}
+
+    def __init__(self, max_length=None, **kwargs):
+        self.max_length = max_length
+        super().__init__(**kwargs)
+
+    def to_pk(self, item):
+        """ Ключ как у IntegerField: 1.5 и '1.5' — ошибка, а не 1. """
+
+        child = self.child_relation
+        if child.pk_field:
+            return child.pk_field.to_internal_value(item)
+        if isinstance(item, bool):
+            child.fail('incorrect_type', data_type=type(item).__name__)
+        try:
+            return serializers.IntegerField().to_internal_value(item)
+        except serializers.ValidationError:
+            child.fail('incorrect_type', data_type=type(item).__name__)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        if self.max_length is not None and len(data) > self.max_length:
+            self.fail('max_length', max_length=self.max_length)
+        pks = [self.to_pk(item) for item in data]
+        objects = self.child_relation.get_queryset().in_bulk(set(pks))
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            raise serializers.ValidationError([
+                self.child_relation.error_messages['does_not_exist'].format(
+                    pk_value=pk
+                )
+                for pk in missing
+            ])
+        return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """ PrimaryKeyRelatedField, который при many=True не делает
+    отдельный запрос на каждый ключ.
+    """
+
+    @classmethod
+    def many_init(cls, *args, max_length=None, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs),
+                       'max_length': max_length}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
 class IngredientSerializer(serializers.ModelSerializer):
     """ Ингредиент. """
 
@@ -39,16 +101,42 @@ class IngredientSerializer(serializers.ModelSerializer):
         model = Ingredient
 
 
+class RecipeIngredientListSerializer(serializers.ListSerializer):
+    """ Ингредиенты рецепта: все id проверяются одним запросом in_bulk,
+    ошибки — у своих элементов, с текстом PrimaryKeyRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        ingredients = Ingredient.objects.in_bulk(
+            {item['id'] for item in items}
+        )
+        does_not_exist = PrimaryKeyRelatedField.default_error_messages[
+            'does_not_exist'
+        ]
+        errors = [
+            {} if item['id'] in ingredients
+            else {'id': [does_not_exist.format(pk_value=item['id'])]}
+            for item in items
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        for item in items:
+            item['id'] = ingredients[item['id']]
+        return items
+
+
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     """ Для создания ингредиента в рецепте. """
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(min_value=MIN_AMOUNT_FOR_INGREDIENT,
                                       max_value=MAX_AMOUNT_FOR_INGREDIENT)
 
     class Meta:
         model = RecipeIngredient
         fields = ('id', 'amount')
+        list_serializer_class = RecipeIngredientListSerializer
 
 
 class RecipeIngredientGetSerializer(serializers.ModelSerializer):
@@ -85,8 +173,9 @@ class RecipeGetSerializer(serializers.ModelSerializer):
                                                 source='recipeingredient')
     author = UserSerializer()
     image = serializers.CharField(source='image.url')
-    is_favorited = serializers.SerializerMethodField()
-    is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    is_favorited = serializers.BooleanField(read_only=True)
+    is_in_shopping_cart = serializers.BooleanField(read_only=True)
 
     class Meta:
         fields = ('id',
@@ -97,26 +186,19 @@ class RecipeGetSerializer(serializers.ModelSerializer):
                   'is_in_shopping_cart',
                   'name',
                   'image',
+                  'image_variants',
                   'text',
                   'cooking_time')
         model = Recipe
         read_only_fields = ('__all__',)
 
-    def get_is_favorited(self, obj):
-        request = self.context['request']
-        return (request and request.user.is_authenticated
-                and obj.favorites.filter(consumer=request.user).exists())
-
-    def get_is_in_shopping_cart(self, obj):
-        request = self.context['request']
-        return (request and request.user.is_authenticated
-                and obj.cart_items.filter(consumer=request.user).exists())
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image, obj.image_variants)
 
 
 class RecipePostSerializer(serializers.ModelSerializer):
     ingredients = RecipeIngredientSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(many=True,
-                                              queryset=Tag.objects.all())
+    tags = BulkPrimaryKeyRelatedField(many=True, queryset=Tag.objects.all())
     author = UserSerializer(default=serializers.CurrentUserDefault())
     image = Base64ImageField(allow_null=False,
                              allow_empty_file=False)
@@ -151,6 +233,7 @@ class RecipePostSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(TAGS_DUPLICATE)
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
@@ -161,11 +244,12 @@ class RecipePostSerializer(serializers.ModelSerializer):
         recipe.tags.set(tags)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        RecipeIngredient.objects.filter(recipe__id=instance.id).delete()
-        self.create_update_ingredients(instance, ingredients)
+        lock_recipes((instance.pk,))
+        self.sync_ingredients(instance, ingredients)
         instance.tags.set(tags)
         return super().update(instance, validated_data)
 
@@ -180,7 +264,47 @@ class RecipePostSerializer(serializers.ModelSerializer):
         ]
         RecipeIngredient.objects.bulk_create(ingredients_data)
 
+    def sync_ingredients(self, recipe, ingredients):
+        """ Изменяет только отличающиеся строки ингредиентов рецепта.
+
+        Разница количеств переносится в списки покупок тех,
+        у кого рецепт в корзине.
+        """
+
+        amounts = {ingredient['id'].id: ingredient['amount']
+                   for ingredient in ingredients}
+        # Не из prefetch: строки читаются после блокировки рецепта.
+        existing = {row.ingredient_id: row for row
+                    in RecipeIngredient.objects.filter(recipe=recipe)}
+        deltas = {ingredient_id: amount - (existing[ingredient_id].amount
+                                           if ingredient_id in existing
+                                           else 0)
+                  for ingredient_id, amount in amounts.items()}
+        removed = []
+        for ingredient_id, row in existing.items():
+            if ingredient_id not in amounts:
+                removed.append(row.id)
+                deltas[ingredient_id] = -row.amount
+        changed = []
+        for ingredient_id, row in existing.items():
+            if row.amount != amounts.get(ingredient_id, row.amount):
+                row.amount = amounts[ingredient_id]
+                changed.append(row)
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        self.create_update_ingredients(recipe, [
+            ingredient for ingredient in ingredients
+            if ingredient['id'].id not in existing
+        ])
+        change_recipe_amounts(recipe.pk, deltas)
+
     def to_representation(self, instance):
+        instance = (Recipe.objects
+                    .with_related()
+                    .with_user_flags(self.context['request'].user)
+                    .get(pk=instance.pk))
         return RecipeGetSerializer(
             context=self.context
         ).to_representation(instance)
@@ -191,46 +315,17 @@ class RecipeShortSerializer(RecipeGetSerializer):
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
         read_only_fields = ('__all__',)
 
 
 """ Валидация корзины и избранного. """
 
 
-class FavCartBaseSerializer(serializers.BaseSerializer):
-
-    def validate(self, attrs):
-        if self.Meta.model.objects.filter(
-            consumer=attrs['consumer'],
-            recipe=attrs['recipe']
-        ).exists():
-            raise serializers.ValidationError(
-                f'Рецепт уже добавлен в {self.Meta.model._meta.verbose_name}!'
-            )
-        return attrs
-
-    def to_representation(self, instance):
-        return RecipeShortSerializer().to_representation(
-            instance.recipe
-        )
+class RecipeIdsSerializer(serializers.Serializer):
+    """ Рецепты для пакетного добавления в избранное или корзину. """
 
-
-class FavoritesSerializer(
-    FavCartBaseSerializer,
-    serializers.ModelSerializer
-):
-    class Meta:
-        model = Favorites
-        fields = '__all__'
-        read_only_fields = ('__all__',)
-
-
-class ShoppingCartSerializer(
-    FavCartBaseSerializer,
-    serializers.ModelSerializer
-):
-    class Meta:
-        model = ShoppingCart
-        fields = '__all__'
-        read_only_fields = ('__all__',)
+    recipes = BulkPrimaryKeyRelatedField(many=True,
+                                         allow_empty=False,
+                                         max_length=MAX_BULK_RECIPES,
+                                         queryset=Recipe.objects.all())
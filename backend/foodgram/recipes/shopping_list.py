@@ -0,0 +1,171 @@
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import Recipe, RecipeIngredient, ShoppingCart, ShoppingListItem
+from users.models import User
+
+REBUILD_CHUNK_SIZE = 5000
+
+
+def lock_recipes(recipe_ids):
+    """ Ингредиенты рецептов не меняются, пока их количества
+    переносятся в списки покупок.
+
+    Рецепты блокируются раньше пользователей: так же поступает
+    change_recipe_amounts(), и взаимных блокировок не бывает.
+    """
+
+    return list(Recipe.objects.select_for_update().filter(
+        pk__in=recipe_ids
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def lock_users(user_ids):
+    """ Изменения списка покупок одного пользователя идут по очереди. """
+
+    return list(User.objects.select_for_update().filter(
+        pk__in=user_ids
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def recipe_amounts(recipe_ids):
+    """ {ингредиент: сумма} по рецептам recipe_ids. """
+
+    return dict(RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by().values('ingredient_id').annotate(
+        total=Sum('amount')
+    ).values_list('ingredient_id', 'total'))
+
+
+def apply_deltas(user_ids, deltas):
+    """ Прибавляет {ингредиент: количество} к спискам покупок user_ids.
+
+    Строки, где количество стало нулевым, удаляются.
+    """
+
+    deltas = {ingredient_id: delta
+              for ingredient_id, delta in deltas.items() if delta}
+    if not user_ids or not deltas:
+        return
+    rows = {
+        (row.user_id, row.ingredient_id): row
+        for row in ShoppingListItem.objects.filter(user_id__in=user_ids,
+                                                   ingredient_id__in=deltas)
+    }
+    created, changed, emptied = [], [], []
+    for user_id in user_ids:
+        for ingredient_id, delta in deltas.items():
+            row = rows.get((user_id, ingredient_id))
+            if row is None:
+                if delta > 0:
+                    created.append(ShoppingListItem(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=delta
+                    ))
+                continue
+            row.total_amount += delta
+            if row.total_amount > 0:
+                changed.append(row)
+            else:
+                emptied.append(row.pk)
+    if emptied:
+        ShoppingListItem.objects.filter(pk__in=emptied).delete()
+    if changed:
+        ShoppingListItem.objects.bulk_update(changed, ('total_amount',),
+                                             batch_size=REBUILD_CHUNK_SIZE)
+    if created:
+        ShoppingListItem.objects.bulk_create(created,
+                                             batch_size=REBUILD_CHUNK_SIZE)
+
+
+@transaction.atomic(savepoint=False)
+def add_to_shopping_list(user_id, recipe_ids, locked=False):
+    """ Рецепты recipe_ids только что добавлены в корзину user_id.
+
+    locked=True — рецепты и пользователь уже заблокированы через
+    lock_recipes() и lock_users().
+    """
+
+    if not recipe_ids:
+        return
+    if not locked:
+        lock_recipes(recipe_ids)
+        lock_users((user_id,))
+    apply_deltas((user_id,), recipe_amounts(recipe_ids))
+
+
+@transaction.atomic(savepoint=False)
+def remove_from_shopping_list(user_id, recipe_ids, locked=False):
+    """ Рецепты recipe_ids убираются из корзины user_id. """
+
+    if not recipe_ids:
+        return
+    if not locked:
+        lock_recipes(recipe_ids)
+        lock_users((user_id,))
+    apply_deltas((user_id,), {ingredient_id: -total for ingredient_id, total
+                              in recipe_amounts(recipe_ids).items()})
+
+
+@transaction.atomic(savepoint=False)
+def change_recipe_amounts(recipe_id, deltas):
+    """ У рецепта изменились ингредиенты: {ингредиент: разница}.
+
+    Рецепт должен быть заблокирован через lock_recipes() до чтения
+    его старых ингредиентов, иначе одновременное добавление в корзину
+    перенесёт в список покупок не те количества.
+    """
+
+    if any(deltas.values()):
+        apply_deltas(
+            lock_users(ShoppingCart.objects.filter(
+                recipe_id=recipe_id
+            ).values('consumer_id')),
+            deltas
+        )
+
+
+@transaction.atomic
+def rebuild_shopping_lists(user_ids=None):
+    """ Пересобирает списки покупок из корзин; возвращает число строк.
+
+    user_ids=None — для всех пользователей.
+    """
+
+    items = ShoppingListItem.objects.all()
+    carts = ShoppingCart.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+        carts = carts.filter(consumer_id__in=user_ids)
+    items.delete()
+    rows = carts.order_by().values(
+        'consumer_id', 'recipe__recipeingredient__ingredient_id'
+    ).annotate(
+        total=Sum('recipe__recipeingredient__amount')
+    ).filter(total__gt=0).values_list(
+        'consumer_id', 'recipe__recipeingredient__ingredient_id', 'total'
+    )
+    created = 0
+    chunk = []
+    for user_id, ingredient_id, total in rows.iterator():
+        chunk.append(ShoppingListItem(user_id=user_id,
+                                      ingredient_id=ingredient_id,
+                                      total_amount=total))
+        if len(chunk) == REBUILD_CHUNK_SIZE:
+            created += len(ShoppingListItem.objects.bulk_create(chunk))
+            chunk = []
+    if chunk:
+        created += len(ShoppingListItem.objects.bulk_create(chunk))
+    return created
+
+
+def shopping_list_rows(user):
+    """ Список покупок пользователя: (название, единица, количество). """
+
+    return ShoppingListItem.objects.filter(user=user).values_list(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        'total_amount'
+    ).order_by('ingredient__name')
@@ -0,0 +1,128 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import (m2m_changed,
+                                      post_delete,
+                                      post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from .counters import COUNTERS, change_counter
+from .models import Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag
+from .shopping_list import add_to_shopping_list, remove_from_shopping_list
+from .versions import bump_after_commit
+from foodgram.constants import (AUTHOR_VERSION,
+                                INGREDIENTS_VERSION,
+                                RECIPE_VERSION,
+                                RECIPES_VERSION,
+                                TAGS_VERSION)
+from users.models import User
+
+_local = threading.local()
+
+
+@contextmanager
+def bulk_change():
+    """ Строки избранного и корзины меняются пачкой в этом потоке.
+
+    Обработчики отдельных строк молчат: счётчики и список покупок
+    пересчитывает вызывающий код одним запросом на всю пачку.
+    """
+
+    _local.bulk = True
+    try:
+        yield
+    finally:
+        _local.bulk = False
+
+
+def in_bulk_change():
+    return getattr(_local, 'bulk', False)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(**kwargs):
+    bump_after_commit(INGREDIENTS_VERSION)
+    bump_after_commit(RECIPES_VERSION)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(**kwargs):
+    bump_after_commit(TAGS_VERSION)
+    bump_after_commit(RECIPES_VERSION)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipes_changed(**kwargs):
+    bump_after_commit(RECIPES_VERSION)
+
+
+@receiver((post_save, post_delete), sender=User)
+def authors_changed(instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_after_commit(RECIPES_VERSION)
+    bump_after_commit(AUTHOR_VERSION.format(instance.pk))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_fragment_changed(instance, **kwargs):
+    bump_after_commit(RECIPE_VERSION.format(instance.pk))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredients_changed(instance, **kwargs):
+    bump_after_commit(RECIPE_VERSION.format(instance.recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        recipe_ids = (instance.pk,)
+    elif pk_set is not None:
+        recipe_ids = pk_set
+    else:
+        # clear() со стороны тега: рецепты уже не найти.
+        recipe_ids = ()
+        bump_after_commit(TAGS_VERSION)
+    for recipe_id in recipe_ids:
+        bump_after_commit(RECIPE_VERSION.format(recipe_id))
+
+
+@receiver(post_save, sender=ShoppingCart)
+def cart_item_added(instance, created, raw=False, **kwargs):
+    if created and not raw and not in_bulk_change():
+        add_to_shopping_list(instance.consumer_id, (instance.recipe_id,))
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def cart_item_deleted(instance, **kwargs):
+    """ До удаления: при удалении рецепта его ингредиенты ещё на месте. """
+
+    if not in_bulk_change():
+        remove_from_shopping_list(instance.consumer_id, (instance.recipe_id,))
+
+
+def connect_counter(model, field, source, foreign_key):
+    """ Счётчик в model меняется при добавлении и удалении строк source. """
+
+    def row_created(instance, created, raw=False, **kwargs):
+        if created and not raw and not in_bulk_change():
+            change_counter(model, getattr(instance, f'{foreign_key}_id'),
+                           field, 1)
+
+    def row_deleted(instance, **kwargs):
+        if not in_bulk_change():
+            change_counter(model, getattr(instance, f'{foreign_key}_id'),
+                           field, -1)
+
+    post_save.connect(row_created, sender=source, weak=False)
+    post_delete.connect(row_deleted, sender=source, weak=False)
+
+
+for counter in COUNTERS:
+    connect_counter(*counter)
@@ -0,0 +1,61 @@
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (Favorites, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Subscription, Tag)
+from users.models import User
+
+INGREDIENT_NAMES = ('Соль', 'Сахар', 'Мука')
+
+
+class RecipeDataMixin:
+    """ Автор и читатель с рецептами, тегами и ингредиентами.
+
+    Рецепты с нечётным номером — автора, с чётным — читателя; у них
+    разное число тегов и ингредиентов. Читатель подписан на автора,
+    recipes[1] у него в избранном, recipes[2] — в корзине, токен
+    читателя — token.
+    """
+
+    recipes_count = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            first_name='Автор', last_name='Рецептов'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            first_name='Читатель', last_name='Рецептов'
+        )
+        cls.tags = [Tag.objects.create(name=f'Тег {i}', color=f'#00000{i}',
+                                       slug=f'tag{i}')
+                    for i in range(2)]
+        cls.ingredients = [Ingredient.objects.create(name=name,
+                                                     measurement_unit='г')
+                           for name in INGREDIENT_NAMES]
+        cls.recipes = [cls.create_recipe(i)
+                       for i in range(cls.recipes_count)]
+        Favorites.objects.create(consumer=cls.reader, recipe=cls.recipes[1])
+        ShoppingCart.objects.create(consumer=cls.reader,
+                                    recipe=cls.recipes[2])
+        Subscription.objects.create(subscriber=cls.reader, author=cls.author)
+        cls.token = Token.objects.create(user=cls.reader)
+
+    @classmethod
+    def create_recipe(cls, number, **fields):
+        recipe = Recipe.objects.create(**{
+            'author': cls.author if number % 2 else cls.reader,
+            'name': f'Рецепт {number}',
+            'image': 'recipes/images/recipe.png',
+            'text': 'Описание',
+            'cooking_time': number + 1,
+            **fields
+        })
+        recipe.tags.set(cls.tags[:number % 2 + 1])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                             amount=number + 1)
+            for ingredient in cls.ingredients[:number % 3 + 1]
+        )
+        return recipe
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.filters import get_tag_ids
+from recipes.tests.fixtures import RecipeDataMixin
+
+RECIPES_URL = '/api/recipes/'
+
+
+@override_settings(RECIPE_CACHE_TIMEOUT=0)
+class RecipeQueriesTest(RecipeDataMixin, TestCase):
+    """ Число запросов ленты и рецепта не зависит от числа рецептов. """
+
+    def setUp(self):
+        cache.clear()
+        # Словарь slug → id тегов живёт в кэше, в счёт он не входит.
+        get_tag_ids()
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def get(self, client, url, queries):
+        with self.assertNumQueries(queries):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_list_anonymous(self):
+        for limit in (1, 8):
+            self.get(self.anonymous, f'{RECIPES_URL}?limit={limit}', 4)
+
+    def test_list_authenticated(self):
+        for limit in (1, 8):
+            data = self.get(self.client, f'{RECIPES_URL}?limit={limit}', 6)
+        flags = {recipe['id']: (recipe['is_favorited'],
+                                recipe['is_in_shopping_cart'],
+                                recipe['author']['is_subscribed'])
+                 for recipe in data['results']}
+        self.assertEqual(flags[self.recipes[1].pk], (True, False, True))
+        self.assertEqual(flags[self.recipes[2].pk], (False, True, False))
+
+    def test_detail_anonymous(self):
+        self.get(self.anonymous, f'{RECIPES_URL}{self.recipes[1].pk}/', 3)
+
+    def test_detail_authenticated(self):
+        data = self.get(self.client, f'{RECIPES_URL}{self.recipes[1].pk}/',
+                        5)
+        self.assertTrue(data['is_favorited'])
+        self.assertFalse(data['is_in_shopping_cart'])
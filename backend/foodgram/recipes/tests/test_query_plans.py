@@ -0,0 +1,42 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.query_plans import explain, hot_requests
+from recipes.search import get_ingredient_index
+from recipes.tests.fixtures import RecipeDataMixin
+
+
+@override_settings(RECIPE_CACHE_TIMEOUT=0)
+class QueryPlansTest(RecipeDataMixin, TestCase):
+    """ Запросы горячих эндпоинтов не читают таблицы целиком.
+
+    То же, что check_query_plans, но на маленькой базе: в PostgreSQL
+    полное чтение запрещается, и Seq Scan остаётся только там, где
+    подходящего индекса нет.
+    """
+
+    def setUp(self):
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+        self.client = APIClient()
+        # Индекс ингредиентов строится из всей таблицы один раз на версию.
+        get_ingredient_index()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def capture(self, path, params, headers):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, params, **headers)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in context.captured_queries
+                if query['sql'].lstrip().upper().startswith('SELECT')]
+
+    def test_no_full_scans(self):
+        for name, path, params, authenticated in hot_requests(connection):
+            with self.subTest(name):
+                for sql in self.capture(path, params,
+                                        self.auth if authenticated else {}):
+                    scanned, _ = explain(connection, sql)
+                    self.assertFalse(scanned, sql)
@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.management.commands.check_recipe_list import RENDERERS
+from recipes.models import Favorites, ShoppingCart
+from recipes.query_plans import hot_requests
+from recipes.tests.fixtures import RecipeDataMixin
+
+RECIPES_URL = '/api/recipes/'
+
+
+@override_settings(RECIPE_CACHE_TIMEOUT=0)
+class RecipeListRenderersTest(RecipeDataMixin, TestCase):
+    """ recipes.listing и recipes.fragments отдают ленту побайтно так же,
+    как RecipeGetSerializer.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for recipe in cls.recipes[3::3]:
+            Favorites.objects.create(consumer=cls.reader, recipe=recipe)
+        ShoppingCart.objects.create(consumer=cls.reader,
+                                    recipe=cls.recipes[4])
+        # Ключи флагов внутри строк не должны сбивать разбор фрагментов.
+        cls.create_recipe(
+            cls.recipes_count,
+            name='"is_favorited":false',
+            text='Кавычки " и \\, "is_in_shopping_cart":false'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+        self.client = APIClient()
+
+    def get_requests(self):
+        requests = [(name, params, authenticated)
+                    for name, path, params, authenticated
+                    in hot_requests(connection)
+                    if path == RECIPES_URL]
+        for limit in (1, 6):
+            requests.extend((
+                (f'recipes?limit={limit} (аноним)', {'limit': limit}, False),
+                (f'recipes?limit={limit}', {'limit': limit}, True),
+                (f'recipes?pagination=cursor&limit={limit}',
+                 {'pagination': 'cursor', 'limit': limit}, True),
+            ))
+        return requests
+
+    def fetch(self, params, headers, renderer_settings):
+        with override_settings(**renderer_settings):
+            response = self.client.get(RECIPES_URL, params, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_renderers_match_serializer(self):
+        (_, serializer_settings), *renderers = RENDERERS
+        for name, params, authenticated in self.get_requests():
+            headers = self.auth if authenticated else {}
+            expected = self.fetch(params, headers, serializer_settings)
+            for renderer, renderer_settings in renderers:
+                # Второй запрос фрагментов берёт их из кэша.
+                for attempt in ('первый', 'повторный'):
+                    with self.subTest(name, renderer=renderer,
+                                      attempt=attempt):
+                        self.assertEqual(
+                            self.fetch(params, headers, renderer_settings),
+                            expected
+                        )
@@ -0,0 +1,65 @@
+from django.db import transaction
+
+from .counters import change_counters
+from .models import ShoppingCart
+from .shopping_list import (add_to_shopping_list,
+                            lock_recipes,
+                            lock_users,
+                            remove_from_shopping_list)
+from .signals import bulk_change
+
+
+def present_recipe_ids(model, user, recipe_ids):
+    return set(model.objects.filter(
+        consumer=user, recipe_id__in=recipe_ids
+    ).values_list('recipe_id', flat=True))
+
+
+def add_recipes(model, user, recipes):
+    """ Добавляет рецепты в избранное или корзину одним INSERT.
+
+    Списки одного пользователя меняются по очереди под блокировкой его
+    строки, поэтому уже добавленные рецепты известны до INSERT и
+    счётчики растут через F() ровно на новые строки. ON CONFLICT DO
+    NOTHING страхует от строк, добавленных в обход API.
+    Для корзины новые рецепты добавляются и в список покупок.
+    """
+
+    recipe_ids = {recipe.pk for recipe in recipes}
+    with transaction.atomic():
+        if model is ShoppingCart:
+            lock_recipes(recipe_ids)
+        lock_users((user.pk,))
+        recipe_ids -= present_recipe_ids(model, user, recipe_ids)
+        model.objects.bulk_create(
+            (model(consumer=user, recipe_id=recipe_id)
+             for recipe_id in recipe_ids),
+            ignore_conflicts=True
+        )
+        if recipe_ids:
+            change_counters(model, recipe_ids, 1)
+        if model is ShoppingCart:
+            add_to_shopping_list(user.pk, recipe_ids, locked=True)
+
+
+def remove_recipes(model, user, recipe_ids):
+    """ Убирает рецепты из избранного или корзины одним DELETE.
+
+    Построчные обработчики сигналов отключены через bulk_change():
+    список покупок и счётчики меняются здесь для всей пачки.
+    """
+
+    with transaction.atomic():
+        if model is ShoppingCart:
+            lock_recipes(recipe_ids)
+        lock_users((user.pk,))
+        present_ids = present_recipe_ids(model, user, recipe_ids)
+        if model is ShoppingCart:
+            remove_from_shopping_list(user.pk, present_ids, locked=True)
+        with bulk_change():
+            deleted, _ = model.objects.filter(
+                consumer=user, recipe_id__in=present_ids
+            ).delete()
+        if present_ids:
+            change_counters(model, present_ids, -1)
+    return deleted
@@ -6,6 +6,6 @@ from foodgram.constants import INVALID_COLOR_FIELD_ERROR_TEXT
 
 
 def validate_color(value):
-    if not re.match(r'^#(?:[0-9a-fA-F]{3}){1,2}$'):
+    if not re.match(r'^#(?:[0-9a-fA-F]{3}){1,2}$', value):
         raise ValidationError(INVALID_COLOR_FIELD_ERROR_TEXT)
     return value
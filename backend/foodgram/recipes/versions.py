@@ -0,0 +1,50 @@
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+from foodgram.constants import CATALOG_VERSION_KEY
+
+
+def now_version():
+    return time.time_ns() // 1000
+
+
+def get_version(name):
+    """ Текущая версия справочника: метка времени в микросекундах. """
+
+    key = CATALOG_VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        version = now_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(name):
+    """ Новая версия справочника после изменения данных. """
+
+    version = max(now_version(), get_version(name) + 1)
+    cache.set(CATALOG_VERSION_KEY.format(name), version, None)
+    return version
+
+
+def bump_after_commit(name):
+    """ Версия меняется после коммита, чтобы запрос, пришедший до него,
+    не закэшировал старые данные под новой версией.
+    """
+
+    transaction.on_commit(partial(bump_version, name))
+
+
+def get_versions(names):
+    """ {имя: версия} для многих справочников за одно обращение к кэшу. """
+
+    keys = {CATALOG_VERSION_KEY.format(name): name for name in names}
+    versions = {keys[key]: version
+                for key, version in cache.get_many(keys).items()}
+    for name in set(names) - versions.keys():
+        versions[name] = get_version(name)
+    return versions
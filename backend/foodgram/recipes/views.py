@@ -1,48 +1,116 @@
 import io
+from functools import partial
 
-from django.db.models import Sum
-from django.http import FileResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Paragraph
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import ParagraphStyle
 
 from .models import (Tag,
                      Recipe,
                      Ingredient,
                      ShoppingCart,
-                     RecipeIngredient,
                      Favorites)
+from .caching import cached_for_anonymous
 from .filters import RecipeFilter
+from .fragments import fragment_rows, render_recipes
+from .listing import recipe_list_data, recipe_rows
+from .pdf import render_shopping_list
+from .search import get_ingredient_index
+from .shopping_list import shopping_list_rows
+from .user_lists import add_recipes, remove_recipes
+from .versions import get_version
 from .serializers import (IngredientSerializer,
                           TagSerializer,
                           RecipePostSerializer,
                           RecipeGetSerializer,
-                          FavoritesSerializer,
-                          ShoppingCartSerializer)
-from foodgram.constants import NONEXISTENT_CART_FAV_ITEM
+                          RecipeIdsSerializer,
+                          RecipeShortSerializer)
+from foodgram.constants import (CATALOG_BODY_KEY,
+                                CATALOG_BODY_TIMEOUT,
+                                CATALOG_MAX_AGE,
+                                INGREDIENTS_VERSION,
+                                SHOPPING_LIST_FILENAME,
+                                SHOPPING_LIST_JOB,
+                                TAGS_VERSION)
+from foodgram.metrics import SerializerTimingMixin
+from foodgram.pagination import RecipePagination
 from foodgram.permissions import IsAuthorOrReadOnly
+from jobs.registry import enqueue
+from jobs.serializers import JobSerializer
 
 
-class TagIngredientViewBase(ReadOnlyModelViewSet):
-    """ Базовый класс для тэга и ингредиента. """
+class TagIngredientViewBase(SerializerTimingMixin, ReadOnlyModelViewSet):
+    """ Базовый класс для тэга и ингредиента.
+
+    Список отдаётся готовыми байтами из кэша версии справочника,
+    с ETag/Last-Modified; повторный запрос с If-None-Match получает
+    304 без обращения к БД.
+    """
 
     pagination_class = None
     permission_classes = (AllowAny,)
+    catalog_version = None
+
+    def perform_authentication(self, request):
+        """ Справочники одинаковы для всех, токен не проверяем. """
+
+    def render_catalog(self, request):
+        return JSONRenderer().render(
+            self.get_serializer(self.get_queryset(), many=True).data
+        )
+
+    def get_catalog_body(self, request, version):
+        if request.query_params:
+            return self.render_catalog(request)
+        key = CATALOG_BODY_KEY.format(self.catalog_version, version)
+        body = cache.get(key)
+        if body is None:
+            body = self.render_catalog(request)
+            cache.set(key, body, CATALOG_BODY_TIMEOUT)
+        return body
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        version = get_version(self.catalog_version)
+        etag = f'"{self.catalog_version}-{version}"'
+        last_modified = version // 1_000_000
+        response = get_conditional_response(request,
+                                            etag=etag,
+                                            last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(
+                self.get_catalog_body(request, version),
+                content_type='application/json'
+            )
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response,
+                            public=True,
+                            max_age=CATALOG_MAX_AGE,
+                            must_revalidate=True)
+        patch_vary_headers(response, ('Accept',))
+        return response
 
 
 class TagViewSet(TagIngredientViewBase):
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
+    catalog_version = TAGS_VERSION
 
 
 class IngredientViewSet(TagIngredientViewBase):
@@ -50,123 +118,202 @@ class IngredientViewSet(TagIngredientViewBase):
     queryset = Ingredient.objects.all()
     filter_backends = (SearchFilter,)
     search_fields = ('^name',)
+    catalog_version = INGREDIENTS_VERSION
+
+    def render_catalog(self, request):
+        return get_ingredient_index().render(
+            request.query_params.get(api_settings.SEARCH_PARAM, ''),
+            contains=settings.INGREDIENT_SEARCH_CONTAINS
+        )
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(SerializerTimingMixin, ModelViewSet):
     serializer_class = RecipePostSerializer
-    queryset = (Recipe.objects.all()
-                .select_related('author')
-                .prefetch_related('tags', 'ingredients'))
     http_method_names = ('get', 'post', 'patch', 'delete')
+    lookup_value_regex = r'\d+'
     permission_classes = (IsAuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    pagination_class = RecipePagination
+
+    def get_queryset(self):
+        return (Recipe.objects
+                .with_related()
+                .with_user_flags(self.request.user))
+
+    def use_fragments(self, request):
+        """ Ответ из готового JSON рецептов: только для компактного JSON. """
+
+        return (settings.RECIPE_FRAGMENT_TIMEOUT
+                and request.accepted_renderer.format == 'json'
+                and 'indent' not in request.accepted_media_type)
+
+    @staticmethod
+    def json_response(body):
+        return HttpResponse(body, content_type='application/json')
+
+    def list(self, request, *args, **kwargs):
+        """ Способ сборки ленты выбирается настройками.
+
+        Готовый JSON рецептов (RECIPE_FRAGMENT_TIMEOUT) важнее
+        RECIPE_LIST_FAST_PATH, который тогда работает только для
+        остальных форматов; оба включать не нужно, см. recipes.W002.
+        """
+
+        if self.use_fragments(request):
+            handler = self.fragments_list
+        elif settings.RECIPE_LIST_FAST_PATH:
+            handler = self.fast_list
+        else:
+            handler = super().list
+        return cached_for_anonymous(
+            partial(handler, request, *args, **kwargs),
+            request,
+            'list'
+        )
+
+    def fragments_list(self, request, *args, **kwargs):
+        """ Страница склеивается из JSON рецептов, см. recipes.fragments. """
+
+        rows = self.paginate_queryset(
+            fragment_rows(self.filter_queryset(self.get_queryset()))
+        )
+        page = JSONRenderer().render(self.get_paginated_response([]).data)
+        head, _, tail = page.rpartition(b'[]')
+        return self.json_response(
+            head + b'[' + b','.join(render_recipes(rows, request)) + b']'
+            + tail
+        )
+
+    def fast_list(self, request, *args, **kwargs):
+        """ Список без вложенных сериализаторов, см. recipes.listing. """
+
+        rows = self.paginate_queryset(
+            recipe_rows(self.filter_queryset(self.get_queryset()))
+        )
+        return self.get_paginated_response(recipe_list_data(rows, request))
+
+    def retrieve(self, request, *args, **kwargs):
+        handler = (self.fragment_retrieve if self.use_fragments(request)
+                   else super().retrieve)
+        return cached_for_anonymous(
+            partial(handler, request, *args, **kwargs),
+            request,
+            'retrieve',
+            kwargs[self.lookup_field]
+        )
+
+    def fragment_retrieve(self, request, *args, **kwargs):
+        row = get_object_or_404(
+            fragment_rows(self.filter_queryset(self.get_queryset())),
+            pk=kwargs[self.lookup_field]
+        )
+        recipes = render_recipes((row,), request)
+        if not recipes:
+            raise Http404
+        return self.json_response(recipes[0])
 
     def get_serializer_class(self):
-        if self.action == ('list' or 'retrieve'):
+        if self.action in ('list', 'retrieve'):
             return RecipeGetSerializer
         return RecipePostSerializer
 
     @staticmethod
-    def create_favorite_or_cart_object(serializer, pk, request):
-
-        data = {
-            'recipe': pk,
-            'consumer': request.user.id
-        }
-
-        serializer = serializer(data=data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+    def add_to_user_list(model, pk, request):
+        """ Повторное добавление не ошибка: рецепт уже в списке. """
 
-        return Response(serializer.data,
+        recipe = get_object_or_404(Recipe.objects.all(), pk=pk)
+        add_recipes(model, request.user, (recipe,))
+        return Response(RecipeShortSerializer(recipe).data,
                         status=status.HTTP_201_CREATED)
 
     @staticmethod
-    def delete_favorite_or_cart_object(model, pk, request):
+    def remove_from_user_list(model, pk, request):
+        remove_recipes(model, request.user, (pk,))
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-        obj = model.objects.filter(consumer=request.user,
-                                   recipe=pk)
-        if obj.exists():
-            obj.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response(NONEXISTENT_CART_FAV_ITEM,
-                        status=status.HTTP_400_BAD_REQUEST)
+    @staticmethod
+    def add_many_to_user_list(model, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Повторы id в ответе не повторяются, порядок сохраняется.
+        recipes = list({recipe.pk: recipe for recipe
+                        in serializer.validated_data['recipes']}.values())
+        add_recipes(model, request.user, recipes)
+        return Response(RecipeShortSerializer(recipes, many=True).data,
+                        status=status.HTTP_201_CREATED)
 
     @staticmethod
-    def create_pdf(queryset):
-
-        to_buy_list = ''
-        model_str = '{} ({}) — {}<br/>'
-
-        for item in queryset:
-            name = item['ingredient__name'].capitalize()
-            measure = item['ingredient__measurement_unit']
-            to_buy_list += model_str.format(name, measure, item['sum_amount'])
-
-        buffer = io.BytesIO()
-        file = canvas.Canvas(buffer)
-        pdfmetrics.registerFont(TTFont('DejaVuSerif', 'DejaVuSerif.ttf'))
-        width, height = A4
-        my_style = ParagraphStyle('my_style',
-                                  fontName='DejaVuSerif',
-                                  fontSize=14)
-        file.setFont('DejaVuSerif', 16)
-        file.drawString(100, height - 100, 'Список покупок:')
-
-        p1 = Paragraph(to_buy_list, my_style)
-        p1.wrapOn(file, 300, 50)
-        p1.drawOn(file, width - 450, height - 150)
-
-        file.save()
-        buffer.seek(0)
-        return buffer
+    def remove_many_from_user_list(model, request):
+        """ Рецепты, которых нет в списке, пропускаются. """
+
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        remove_recipes(model, request.user,
+                       [recipe.pk
+                        for recipe in serializer.validated_data['recipes']])
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True,
             methods=('post',),
             url_path='favorite',
             permission_classes=(IsAuthenticated,))
     def favorite(self, request, pk):
-        return self.create_favorite_or_cart_object(
-            FavoritesSerializer,
-            pk,
-            request
-        )
+        return self.add_to_user_list(Favorites, pk, request)
 
     @favorite.mapping.delete
     def delete_favorite(self, request, pk):
-        return self.delete_favorite_or_cart_object(Favorites, pk, request)
+        return self.remove_from_user_list(Favorites, pk, request)
+
+    @action(detail=False,
+            methods=('post',),
+            url_path='favorite',
+            url_name='favorite-many',
+            permission_classes=(IsAuthenticated,))
+    def favorite_many(self, request):
+        return self.add_many_to_user_list(Favorites, request)
+
+    @favorite_many.mapping.delete
+    def delete_favorite_many(self, request):
+        return self.remove_many_from_user_list(Favorites, request)
 
     @action(detail=True,
             methods=('post',),
             url_path='shopping_cart',
             permission_classes=(IsAuthenticated,))
     def shopping_cart(self, request, pk):
-        return self.create_favorite_or_cart_object(
-            ShoppingCartSerializer,
-            pk,
-            request
-        )
+        return self.add_to_user_list(ShoppingCart, pk, request)
 
     @shopping_cart.mapping.delete
     def delete_cart(self, request, pk):
-        return self.delete_favorite_or_cart_object(ShoppingCart, pk, request)
+        return self.remove_from_user_list(ShoppingCart, pk, request)
+
+    @action(detail=False,
+            methods=('post',),
+            url_path='shopping_cart',
+            url_name='shopping-cart-many',
+            permission_classes=(IsAuthenticated,))
+    def shopping_cart_many(self, request):
+        return self.add_many_to_user_list(ShoppingCart, request)
+
+    @shopping_cart_many.mapping.delete
+    def delete_cart_many(self, request):
+        return self.remove_many_from_user_list(ShoppingCart, request)
 
     @action(detail=False,
             url_path='download_shopping_cart',
             permission_classes=(IsAuthenticated,))
     def download_shopping_cart(self, request):
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__cart_items__consumer=request.user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(
-            sum_amount=Sum('amount')
-        ).order_by('ingredient__name')
-
-        print(ingredients)
-
-        return FileResponse(self.create_pdf(ingredients),
-                            as_attachment=True,
-                            filename='список_покупок.pdf')
+        return FileResponse(
+            io.BytesIO(render_shopping_list(shopping_list_rows(request.user))),
+            as_attachment=True,
+            filename=SHOPPING_LIST_FILENAME
+        )
+
+    @download_shopping_cart.mapping.post
+    def export_shopping_cart(self, request):
+        job = enqueue(SHOPPING_LIST_JOB, owner=request.user)
+        serializer = JobSerializer(job, context={'request': request})
+        return Response(serializer.data,
+                        status=status.HTTP_202_ACCEPTED,
+                        headers={'Location': serializer.data['url']})
@@ -14,9 +14,9 @@ class UserAdmin(BaseUserAdmin):
                     'first_name',
                     'last_name',
                     'recipes_count',
-                    'subs_count')
+                    'followers_count')
     readonly_fields = ('recipes_count',
-                       'subs_count')
+                       'followers_count')
     actions = ('ban_users',)
 
     @admin.action(description='Заблокировать пользователей')
@@ -32,11 +32,3 @@ class UserAdmin(BaseUserAdmin):
             % updated,
             messages.SUCCESS,
         )
-
-    @admin.display(description='Cоздано рецептов:')
-    def recipes_count(self, obj):
-        return obj.recipes.count()
-
-    @admin.display(description='Подписчиков:')
-    def subs_count(self, obj):
-        return obj.subs_author.count()
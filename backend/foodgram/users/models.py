@@ -31,6 +31,14 @@ class User(AbstractUser):
                                   max_length=MAX_NAME_PASSWORD_CHARACTERS)
     last_name = models.CharField('Фамилия',
                                  max_length=MAX_NAME_PASSWORD_CHARACTERS)
+    recipes_count = models.PositiveIntegerField('создано рецептов',
+                                                default=0,
+                                                db_index=True,
+                                                editable=False)
+    followers_count = models.PositiveIntegerField('подписчиков',
+                                                  default=0,
+                                                  db_index=True,
+                                                  editable=False)
 
     class Meta:
         ordering = ('username',)
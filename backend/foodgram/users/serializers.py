@@ -1,10 +1,28 @@
 from rest_framework import serializers
 
 from .models import User
-from foodgram.constants import DOUBLE_SUB, SELF_SUB
+from foodgram.constants import DOUBLE_SUB, INVALID_RECIPES_LIMIT, SELF_SUB
 from recipes.models import Subscription
 
 
+def get_subscribed_ids(request):
+    """ ID авторов, на которых подписан текущий пользователь.
+
+    Загружаются одним запросом и запоминаются на объекте запроса,
+    чтобы все сериализаторы пользователей в ответе брали их из памяти.
+    """
+
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+    subscribed_ids = getattr(request, '_subscribed_ids', None)
+    if subscribed_ids is None:
+        subscribed_ids = frozenset(
+            request.user.subs_subscriber.values_list('author_id', flat=True)
+        )
+        request._subscribed_ids = subscribed_ids
+    return subscribed_ids
+
+
 class UserSerializer(serializers.ModelSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
@@ -16,20 +34,34 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'is_subscribed')
 
     def get_is_subscribed(self, obj):
-        request = self.context['request']
-        return (request and request.user.is_authenticated
-                and obj.subs_author.filter(subscriber=request.user).exists())
+        is_subscribed = getattr(obj, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
+        return obj.id in get_subscribed_ids(self.context.get('request'))
 
 
 """ Подписки. """
 
 
-class SubscriptionGetSerializer(UserSerializer):
+def get_recipes_limit(request):
+    """ Параметр recipes_limit: None, если не задан. """
 
-    from recipes.serializers import RecipeShortSerializer
+    recipes_limit = request.query_params.get('recipes_limit')
+    if not recipes_limit:
+        return None
+    try:
+        recipes_limit = int(recipes_limit)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError(INVALID_RECIPES_LIMIT)
+    if recipes_limit < 0:
+        raise serializers.ValidationError(INVALID_RECIPES_LIMIT)
+    return recipes_limit
+
+
+class SubscriptionGetSerializer(UserSerializer):
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source='recipes.count')
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta():
         model = User
@@ -38,16 +70,15 @@ class SubscriptionGetSerializer(UserSerializer):
         read_only_fields = ('__all__',)
 
     def get_recipes(self, obj):
-        recipes = obj.recipes.all()
-        recipes_limit = (self.context['request']
-                         .query_params.get('recipes_limit'))
-        if recipes_limit:
-            try:
-                recipes_limit = int(recipes_limit)
+        from recipes.serializers import RecipeShortSerializer
+
+        recipes = getattr(obj, 'limited_recipes', None)
+        if recipes is None:
+            recipes = obj.recipes.all()
+            recipes_limit = get_recipes_limit(self.context['request'])
+            if recipes_limit is not None:
                 recipes = recipes[:recipes_limit]
-            except TypeError:
-                pass
-        return self.RecipeShortSerializer(recipes, many=True).data
+        return RecipeShortSerializer(recipes, many=True).data
 
 
 class SubscriptionPostSerializer(serializers.ModelSerializer):
@@ -70,6 +101,7 @@ class SubscriptionPostSerializer(serializers.ModelSerializer):
         return data
 
     def to_representation(self, instance):
+        author = User.objects.get(pk=instance.author_id)
         return SubscriptionGetSerializer(
             context=self.context
-        ).to_representation(instance.author)
+        ).to_representation(author)
@@ -1,3 +1,4 @@
+from django.db.models import Value
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
@@ -7,12 +8,17 @@ from rest_framework.response import Response
 from .models import User
 from .serializers import (
     SubscriptionPostSerializer,
-    SubscriptionGetSerializer
+    SubscriptionGetSerializer,
+    get_recipes_limit
 )
 from foodgram.constants import NONEXISTENT_SUB
+from foodgram.metrics import SerializerTimingMixin
+from foodgram.pagination import UserPagination
+from recipes.models import Recipe
 
 
-class SubscriptionViewSet(UserViewSet):
+class SubscriptionViewSet(SerializerTimingMixin, UserViewSet):
+    pagination_class = UserPagination
 
     @action(detail=True,
             methods=('post',),
@@ -48,18 +54,26 @@ class SubscriptionViewSet(UserViewSet):
             methods=('get',),
             url_path='subscriptions')
     def subscriptions(self, request):
-        return (
-            self.get_paginated_response(
-                SubscriptionGetSerializer(
-                    self.paginate_queryset(
-                        User.objects.filter(
-                            subs_author__subscriber=self.request.user.id
-                        )
-                    ),
-                    many=True,
-                    context={'request': request}
-                ).data
-            )
+        recipes_limit = get_recipes_limit(request)
+        authors = self.paginate_queryset(
+            User.objects.filter(
+                subs_author__subscriber=self.request.user.id
+            ).annotate(
+                is_subscribed=Value(True)
+            ).order_by('username')
+        )
+        recipes = Recipe.objects.first_per_author(
+            [author.id for author in authors],
+            recipes_limit
+        )
+        for author in authors:
+            author.limited_recipes = recipes.get(author.id, [])
+        return self.get_paginated_response(
+            self.timed(SubscriptionGetSerializer(
+                authors,
+                many=True,
+                context={'request': request}
+            )).data
         )
 
     def get_permissions(self):